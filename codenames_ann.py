@@ -0,0 +1,183 @@
+"""Approximate nearest-neighbour clue retrieval over the embedding vocabulary.
+
+WordNet hypernyms only offer a handful of candidates per target. This module
+keeps an IVF (inverted file) index over every vocabulary word that is a
+WordNet noun and not a stopword: k-means centroids partition the unit
+vectors, and a query only scans the few lists whose centroids are closest.
+Retrieved words are reranked by the exact scorer in codenames_game.
+
+The index is built once per (model, WordNet) pair and cached on disk as
+plain .npy files, which are memory-mapped on load.
+"""
+import itertools
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from codenames_artifacts import cache_dir, wordnet_fingerprint
+from codenames_embeddings import get_model, model_fingerprint, unit_vectors
+from codenames_game import get_stopwords, get_wordnet, legality_index
+
+ANN_INDEX_VERSION = 1
+
+_lock = threading.Lock()
+_index = None
+
+
+# ============================================
+# INDEX
+# ============================================
+
+def clue_vocabulary(model):
+    """Model words usable as clues: alphabetic WordNet nouns, no stopwords"""
+    nouns = set(get_wordnet().all_lemma_names('n'))
+    stopwords = get_stopwords()
+    return [
+        w for w in model.index_to_key
+        if w in nouns and w.isalpha() and len(w) >= 3 and w not in stopwords
+    ]
+
+
+def kmeans(vectors, num_lists, iterations=10, seed=0):
+    """Spherical k-means on unit vectors. Returns (centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), num_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed empty lists with random points
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class IVFIndex:
+    """Word vectors grouped into inverted lists by their nearest centroid"""
+
+    def __init__(self, words, vectors, centroids, offsets):
+        self.words = words          # list ordered by list id
+        self.vectors = vectors      # unit vectors in the same order
+        self.centroids = centroids
+        self.offsets = offsets      # list i is rows offsets[i]:offsets[i + 1]
+
+    @classmethod
+    def build(cls, model, num_lists=None, iterations=10, seed=0):
+        words = clue_vocabulary(model)
+        vectors, _ = unit_vectors(model, words)
+        num_lists = num_lists or max(1, int(np.sqrt(len(words))))
+        centroids, assignment = kmeans(vectors, num_lists, iterations, seed)
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.zeros(num_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=num_lists), out=offsets[1:])
+        return cls([words[i] for i in order], vectors[order], centroids.astype(np.float32), offsets)
+
+    def save(self, path):
+        """
+        Write the index into a temporary directory and rename it into place,
+        so a reader never sees a half-written index. If another process got
+        there first, its copy is kept.
+        """
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, 'vectors.npy'), self.vectors)
+        np.save(os.path.join(tmp, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(tmp, 'offsets.npy'), self.offsets)
+        with open(os.path.join(tmp, 'words.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.words))
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'words.txt'), encoding='utf-8') as f:
+            words = f.read().split('\n')
+        vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        offsets = np.load(os.path.join(path, 'offsets.npy'))
+        if len(words) != len(vectors) or offsets[-1] != len(words):
+            raise ValueError(f"ANN index at {path} is inconsistent: "
+                             f"{len(words)} words, {len(vectors)} vectors")
+        return cls(words, vectors, np.load(os.path.join(path, 'centroids.npy')), offsets)
+
+    def search(self, queries, k=50, nprobe=8):
+        """
+        Approximate top-k words by cosine for each row of queries (unit
+        vectors). Returns one list of (word, similarity) per query.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        results = []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([
+                np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists
+            ])
+            sims = np.asarray(self.vectors[rows]) @ query
+            top = min(k, len(rows))
+            best = np.argpartition(-sims, top - 1)[:top]
+            best = best[np.argsort(-sims[best], kind='stable')]
+            results.append([(self.words[rows[i]], float(sims[i])) for i in best])
+        return results
+
+
+def load_ann_index():
+    """IVF index for the current model, loaded from cache or built on first use"""
+    global _index
+    model = get_model()
+    index = _index
+    if index is not None and index[0] is model:
+        return index[1]
+    with _lock:
+        if _index is None or _index[0] is not model:
+            path = os.path.join(
+                cache_dir(),
+                f"ann-v{ANN_INDEX_VERSION}-{wordnet_fingerprint()}-{model_fingerprint(model)}",
+            )
+            ivf = None
+            if os.path.isdir(path):
+                try:
+                    ivf = IVFIndex.load(path)
+                except (OSError, ValueError):
+                    # Left over from an older, non-atomic save: rebuild it
+                    shutil.rmtree(path, ignore_errors=True)
+            if ivf is None:
+                ivf = IVFIndex.build(model)
+                ivf.save(path)
+            _index = (model, ivf)
+        return _index[1]
+
+
+# ============================================
+# CLUE CANDIDATES
+# ============================================
+
+def ann_candidates(target_words, all_board_words, k=50, nprobe=8):
+    """
+    Legal clue candidates near the targets.
+
+    Queries the centroid of every single target and every pair of targets,
+    so the candidates cover the groupings the subset search ranks.
+    """
+    vectors, in_vocab = unit_vectors(get_model(), list(target_words))
+    vectors = vectors[in_vocab]
+    if not len(vectors):
+        return set()
+    groups = [(i,) for i in range(len(vectors))] + list(itertools.combinations(range(len(vectors)), 2))
+    queries = np.stack([vectors[list(g)].sum(axis=0) for g in groups])
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    legality = legality_index(all_board_words)
+    candidates = set()
+    for hits in load_ann_index().search(queries, k=k, nprobe=nprobe):
+        candidates.update(word for word, _ in hits if not legality.is_illegal(word))
+    return candidates
@@ -0,0 +1,444 @@
+"""Precomputed, on-disk artifacts derived from WordNet.
+
+Artifacts live in a cache directory ($CODENAMES_CACHE_DIR, default
+~/.cache/codenames). Their file names carry a fingerprint of the installed
+WordNet data, so a corpus change makes them stale and they are rebuilt on
+next use.
+"""
+import argparse
+import hashlib
+import io
+import itertools
+import os
+import pickle
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from codenames_game import breakapart_compound_word, get_stopwords, get_wordnet
+
+CACHE_DIR_ENV = 'CODENAMES_CACHE_DIR'
+
+# Bump when the layout or the cleaning rules of an artifact change
+CLUE_INDEX_VERSION = 1
+NOUN_POOL_VERSION = 1
+WUP_TABLE_VERSION = 1
+
+# Board words are drawn from the lemmas of the first N noun synsets
+NOUN_POOL_SYNSETS = 5000
+
+_lock = threading.Lock()
+_clue_index = None
+_noun_pool = None
+_noun_pool_ids = None
+_wup_table = None
+
+
+# ============================================
+# CACHE LOCATION / VERSIONING
+# ============================================
+
+def cache_dir():
+    path = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.path.expanduser('~'), '.cache', 'codenames'
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _nltk_data_dirs():
+    """nltk.data.path, rebuilt without importing nltk (which pulls in scipy) if it isn't yet"""
+    if 'nltk' in sys.modules or os.name == 'nt':
+        import nltk.data
+        return list(nltk.data.path)
+    dirs = [os.path.expanduser(d) for d in os.environ.get('NLTK_DATA', '').split(os.pathsep) if d]
+    if 'APPENGINE_RUNTIME' not in os.environ and os.path.expanduser('~/') != '~/':
+        dirs.append(os.path.expanduser('~/nltk_data'))
+    return dirs + [
+        os.path.join(sys.prefix, 'nltk_data'),
+        os.path.join(sys.prefix, 'share', 'nltk_data'),
+        os.path.join(sys.prefix, 'lib', 'nltk_data'),
+        '/usr/share/nltk_data',
+        '/usr/local/share/nltk_data',
+        '/usr/lib/nltk_data',
+        '/usr/local/lib/nltk_data',
+    ]
+
+
+def _corpus_files(corpus, names):
+    """Files of an nltk corpus (or its zip archive) where nltk.data.find would look, or None"""
+    dirs = _nltk_data_dirs()
+    for root in dirs:
+        base = os.path.join(root, 'corpora', corpus)
+        if os.path.isdir(base):
+            return [os.path.join(base, name) for name in names]
+    for root in dirs:
+        if os.path.isfile(os.path.join(root, 'corpora', f"{corpus}.zip")):
+            return [os.path.join(root, 'corpora', f"{corpus}.zip")]
+    return None
+
+
+def _fingerprint_files():
+    wordnet = _corpus_files('wordnet', ['data.noun', 'data.verb', 'data.adj', 'data.adv'])
+    stopwords = _corpus_files('stopwords', ['english'])
+    if wordnet is None or stopwords is None:
+        return None
+    return wordnet + stopwords
+
+
+def wordnet_fingerprint():
+    """
+    Short hash of the installed WordNet data files and the stopword list
+    (their sizes and mtimes). Only the files are stat'ed: importing nltk and
+    loading the corpus would cost seconds on every cold start that finds
+    its artifacts already built.
+    """
+    files = _fingerprint_files()
+    if files is None:
+        # Not installed yet (or only nltk knows where): let nltk find or fetch them
+        get_wordnet().ensure_loaded()
+        get_stopwords()
+        files = _fingerprint_files()
+    digest = hashlib.sha1()
+    for path in files:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+def artifact_path(name, version, ext='pickle'):
+    return os.path.join(cache_dir(), f"{name}-v{version}-{wordnet_fingerprint()}.{ext}")
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ============================================
+# HYPERNYM CLUE INDEX
+# ============================================
+
+def hypernym_candidates_uncached(word):
+    """
+    Walk wn.synsets(word) -> hypernyms() -> lemmas() once.
+
+    Returns a tuple of (lemma_name, cleaned_parts). The legality check runs
+    on the full lemma name, so both are kept: a board can rule out
+    'domestic_animal' as a whole, which also drops its part 'domestic'.
+    """
+    stopwords = get_stopwords()
+    candidates = {}
+    for synset in get_wordnet().synsets(word.lower()):
+        for hyp in synset.hypernyms():
+            for lemma in hyp.lemmas():
+                name = lemma.name()
+                if name in candidates:
+                    continue
+                candidates[name] = tuple(
+                    part for part in breakapart_compound_word(name)
+                    if part.lower() not in stopwords and len(part) >= 3
+                )
+    return tuple(candidates.items())
+
+
+def build_clue_index():
+    """word -> hypernym candidates for every WordNet lemma name"""
+    index = {}
+    for name in get_wordnet().all_lemma_names():
+        candidates = hypernym_candidates_uncached(name)
+        if candidates:
+            index[name] = candidates
+    return index
+
+
+def load_clue_index():
+    """Load the clue index for the installed WordNet, building it if stale"""
+    global _clue_index
+    if _clue_index is not None:
+        return _clue_index
+    with _lock:
+        if _clue_index is None:
+            path = artifact_path('clue_index', CLUE_INDEX_VERSION)
+            try:
+                with open(path, 'rb') as f:
+                    _clue_index = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                _clue_index = build_clue_index()
+                _write_atomic(path, pickle.dumps(_clue_index, pickle.HIGHEST_PROTOCOL))
+    return _clue_index
+
+
+def hypernym_candidates(word):
+    """Indexed lookup; words outside the index (e.g. inflected forms) are walked live"""
+    index = load_clue_index()
+    key = word.lower()
+    if key in index:
+        return index[key]
+    # Memoized in memory only; the file on disk stays a pure build output
+    candidates = index[key] = hypernym_candidates_uncached(key)
+    return candidates
+
+
+# ============================================
+# BOARD WORD POOL
+# ============================================
+
+def build_noun_pool(num_synsets=NOUN_POOL_SYNSETS):
+    """Single-word, alphabetic noun lemmas longer than 3 letters, sorted"""
+    nouns = set()
+    for synset in itertools.islice(get_wordnet().all_synsets('n'), num_synsets):
+        for lemma in synset.lemmas():
+            word = lemma.name()
+            if word.isalpha() and '_' not in word and len(word) > 3:
+                nouns.add(word.lower())
+    return tuple(sorted(nouns))
+
+
+def load_noun_pool():
+    """Load the board word pool for the installed WordNet, building it if stale"""
+    global _noun_pool
+    if _noun_pool is not None:
+        return _noun_pool
+    with _lock:
+        if _noun_pool is None:
+            path = artifact_path('noun_pool', NOUN_POOL_VERSION, ext='txt')
+            try:
+                with open(path, encoding='utf-8') as f:
+                    _noun_pool = tuple(f.read().split())
+            except OSError:
+                _noun_pool = build_noun_pool()
+                _write_atomic(path, '\n'.join(_noun_pool).encode('utf-8'))
+    return _noun_pool
+
+
+def noun_pool_ids():
+    """(word -> position in the noun pool, CRC32 of the pool) for compact board encoding"""
+    global _noun_pool_ids
+    if _noun_pool_ids is None:
+        pool = load_noun_pool()
+        _noun_pool_ids = (
+            {word: i for i, word in enumerate(pool)},
+            zlib.crc32('\n'.join(pool).encode('utf-8')),
+        )
+    return _noun_pool_ids
+
+
+# ============================================
+# WU-PALMER SIMILARITY TABLE
+# ============================================
+
+class WupTable:
+    """
+    Wu-Palmer similarity (as nltk's wup_similarity) from precomputed arrays.
+
+    Synset ids are positions in name order, which is also nltk's tie-break
+    between equally deep common hypernyms. Per synset the table keeps min
+    and max depth, height (the longest of its shortest hypernym paths, for
+    nltk's simulated root on non-nouns) and its hypernym closure with hop
+    distances, in CSR form with ancestors sorted by id. Words map to their
+    first synset, like wordnet_similarity().
+
+    Path lengths to the common hypernym are the shortest routes over any
+    ancestor the two synsets share, as in nltk, so multiple-inheritance
+    synsets get the same (sometimes detoured) distances.
+    """
+
+    def __init__(self, names, words, word_synsets, min_depth, max_depth, height,
+                 needs_root, offsets, ancestors, distances):
+        self.names = names
+        self.word_ids = dict(zip(words, word_synsets.tolist()))
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.height = height
+        self.needs_root = needs_root
+        self.offsets = offsets
+        self.ancestors = ancestors
+        self.distances = distances
+        self._name_ids = None
+
+    def synset_ids(self, words):
+        """First-synset id per word (-1 if not in WordNet)"""
+        ids = np.empty(len(words), dtype=np.int64)
+        for i, word in enumerate(words):
+            key = word.lower()
+            sid = self.word_ids.get(key)
+            if sid is None:
+                # Inflected forms etc.: resolve live (morphy) and memoize
+                sid = self.word_ids[key] = self._resolve(key)
+            ids[i] = sid
+        return ids
+
+    def _resolve(self, word):
+        synsets = get_wordnet().synsets(word)
+        if not synsets:
+            return -1
+        if self._name_ids is None:
+            self._name_ids = {name: i for i, name in enumerate(self.names)}
+        return self._name_ids.get(synsets[0].name(), -1)
+
+    def _closure(self, ids):
+        """Concatenated closure entries of ids: (entry rows, segment starts, lengths)"""
+        starts = self.offsets[ids]
+        lengths = self.offsets[ids + 1] - starts
+        first = np.cumsum(lengths) - lengths
+        rows = np.arange(int(lengths.sum())) + np.repeat(starts - first, lengths)
+        return rows, first, lengths
+
+    def _path_lengths(self, ids, keys, dists, owners, subsumers):
+        """
+        nltk's shortest_path_distance(ids[owner], subsumer) per pair: the
+        best route over any ancestor shared by the two, not only straight up.
+        keys/dists are the sorted (owner, ancestor) closure entries of ids.
+        """
+        n = len(self.names)
+        entries, first, lengths = self._closure(subsumers)
+        query = np.repeat(owners, lengths) * n + self.ancestors[entries]
+        pos = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        route = np.where(keys[pos] == query, dists[pos], np.inf) + self.distances[entries]
+        return np.minimum.reduceat(route, first)
+
+    def matrix(self, words_a, words_b):
+        """WuP of every word in words_a against every word in words_b (0.0 if undefined)"""
+        ids_a = self.synset_ids(words_a)
+        ids_b = self.synset_ids(words_b)
+        out = np.zeros((len(ids_a), len(ids_b)), dtype=np.float32)
+        rows = np.flatnonzero(ids_a >= 0)
+        cols = np.flatnonzero(ids_b >= 0)
+        if not len(rows) or not len(cols):
+            return out
+        a, b = ids_a[rows], ids_b[cols]
+        n = len(self.names)
+
+        # Closures as sorted (owner, ancestor) keys with hop distances
+        entries, first, lengths = self._closure(a)
+        anc = self.ancestors[entries]
+        keys_a = np.repeat(np.arange(len(a), dtype=np.int64), lengths) * n + anc
+        dist_a = self.distances[entries].astype(np.float64)
+        b_entries, _, b_lengths = self._closure(b)
+        keys_b = np.repeat(np.arange(len(b), dtype=np.int64), b_lengths) * n + self.ancestors[b_entries]
+        dist_b = self.distances[b_entries].astype(np.float64)
+
+        # Lowest common hypernym per (b, a) pair: deepest min_depth, then a
+        # itself, then name order. The rank encodes the ancestor id.
+        query = np.arange(len(b), dtype=np.int64)[:, None] * n + anc[None, :]
+        pos = np.minimum(np.searchsorted(keys_b, query), len(keys_b) - 1)
+        common = keys_b[pos] == query
+        rank = (self.min_depth[anc].astype(np.int64) * (2 * n + 4)
+                + (dist_a == 0) * (n + 2) + (n - anc))
+        best = np.maximum.reduceat(np.where(common, rank, -1), first, axis=1)
+
+        # Non-noun pairs get nltk's simulated root, which outranks real
+        # depth-0 hypernyms other than a itself
+        needs_root = self.needs_root[a][None, :] | self.needs_root[b][:, None]
+        root = needs_root & (best < n + 1)
+        sims = np.where(root, 2.0 / (self.height[a][None, :] + self.height[b][:, None] + 4.0), 0.0)
+
+        pair_b, pair_a = np.nonzero((best >= 0) & ~root)
+        if len(pair_b):
+            subsumers = n - best[pair_b, pair_a] % (n + 2)
+            depth = self.max_depth[subsumers] + 1.0
+            len_a = self._path_lengths(a, keys_a, dist_a, pair_a, subsumers)
+            len_b = self._path_lengths(b, keys_b, dist_b, pair_b, subsumers)
+            sims[pair_b, pair_a] = 2 * depth / (len_a + len_b + 2 * depth)
+        out[np.ix_(rows, cols)] = sims.T
+        return out
+
+    def save(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            names=np.frombuffer('\n'.join(self.names).encode('utf-8'), dtype=np.uint8),
+            words=np.frombuffer('\n'.join(self.word_ids).encode('utf-8'), dtype=np.uint8),
+            word_synsets=np.fromiter(self.word_ids.values(), dtype=np.int32),
+            min_depth=self.min_depth, max_depth=self.max_depth, height=self.height,
+            needs_root=self.needs_root, offsets=self.offsets,
+            ancestors=self.ancestors, distances=self.distances,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data['names'].tobytes().decode('utf-8').split('\n'),
+                data['words'].tobytes().decode('utf-8').split('\n'),
+                data['word_synsets'],
+                data['min_depth'], data['max_depth'], data['height'], data['needs_root'],
+                data['offsets'], data['ancestors'], data['distances'],
+            )
+
+
+def build_wup_table():
+    """Depths and hypernym closures for every synset; first synset for every lemma name"""
+    wn = get_wordnet()
+    synsets = sorted(wn.all_synsets(), key=lambda s: s.name())
+    ids = {s.name(): i for i, s in enumerate(synsets)}
+    closures = {}
+
+    def closure(synset):
+        # {ancestor id: shortest hop distance}, including the synset itself
+        sid = ids[synset.name()]
+        if sid not in closures:
+            dist = {sid: 0}
+            for parent in synset.hypernyms() + synset.instance_hypernyms():
+                for anc, d in closure(parent).items():
+                    if d + 1 < dist.get(anc, len(ids)):
+                        dist[anc] = d + 1
+            closures[sid] = dist
+        return closures[sid]
+
+    offsets = np.zeros(len(synsets) + 1, dtype=np.int64)
+    ancestors, distances = [], []
+    for i, synset in enumerate(synsets):
+        dist = closure(synset)
+        for anc in sorted(dist):
+            ancestors.append(anc)
+            distances.append(dist[anc])
+        offsets[i + 1] = len(ancestors)
+
+    words = list(wn.all_lemma_names())
+    word_synsets = np.array(
+        [ids[first[0].name()] if (first := wn.synsets(w)) else -1 for w in words], dtype=np.int32
+    )
+    return WupTable(
+        [s.name() for s in synsets], words, word_synsets,
+        np.array([s.min_depth() for s in synsets], dtype=np.int16),
+        np.array([s.max_depth() for s in synsets], dtype=np.int16),
+        np.array([max(closures[i].values()) for i in range(len(synsets))], dtype=np.int16),
+        np.array([s.pos() != 'n' for s in synsets], dtype=bool),
+        offsets, np.array(ancestors, dtype=np.int32), np.array(distances, dtype=np.int8),
+    )
+
+
+def load_wup_table():
+    """Load the Wu-Palmer table for the installed WordNet, building it if stale"""
+    global _wup_table
+    if _wup_table is not None:
+        return _wup_table
+    with _lock:
+        if _wup_table is None:
+            path = artifact_path('wup', WUP_TABLE_VERSION, ext='npz')
+            try:
+                _wup_table = WupTable.load(path)
+            except (OSError, ValueError, KeyError):
+                _wup_table = build_wup_table()
+                _write_atomic(path, _wup_table.save())
+    return _wup_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build WordNet artifacts")
+    parser.add_argument('command', choices=['build'])
+    parser.parse_args()
+
+    index = load_clue_index()
+    print(f"Clue index: {len(index)} words -> {artifact_path('clue_index', CLUE_INDEX_VERSION)}")
+    pool = load_noun_pool()
+    print(f"Noun pool: {len(pool)} words -> {artifact_path('noun_pool', NOUN_POOL_VERSION, ext='txt')}")
+    wup = load_wup_table()
+    print(f"WuP table: {len(wup.names)} synsets -> {artifact_path('wup', WUP_TABLE_VERSION, ext='npz')}")
@@ -0,0 +1,411 @@
+"""Benchmarks for the hot paths: clue generation, scoring, legality, game state.
+
+Runs offline against seeded boards and a synthetic embedding fixture (random
+vectors for the board pool and its clue candidates), and writes JSON with
+p50/p95 latency and peak allocation per operation.
+
+    python codenames_bench.py run --output before.json
+    python codenames_bench.py run --output after.json
+    python codenames_bench.py compare before.json after.json --threshold 0.10
+
+The quantization command checks that a float16 / int8 copy of the model
+still picks the same clues as float32 on seeded boards:
+
+    python codenames_bench.py quantization --dtype int8 float16 --real-model
+"""
+import argparse
+import functools
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import codenames_embeddings
+from codenames_artifacts import hypernym_candidates, load_clue_index, load_noun_pool, load_wup_table
+from codenames_embeddings import VectorStore, cosine_matrix
+from codenames_game import (
+    SCORING_MODES,
+    BoardLegalityIndex,
+    CodenamesGame,
+    generate_all_clues,
+    generate_clues_for_word,
+    is_illegal_clue,
+    precompute_suggestions,
+    score_clues,
+    score_matrix,
+    setup_game,
+    similarity_matrix,
+    suggest_batch,
+    suggest_clues,
+    top_clues,
+)
+
+BENCH_FORMAT = 1
+
+
+# ============================================
+# FIXTURES
+# ============================================
+
+def synthetic_store(dim=50, seed=0):
+    """Random unit vectors for every pool word and every clue candidate part"""
+    words = set(load_noun_pool())
+    for word in load_noun_pool():
+        for _, parts in hypernym_candidates(word):
+            words.update(p.lower() for p in parts)
+    words = sorted(words)
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((len(words), dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return VectorStore(words, vectors)
+
+
+class Context:
+    """Seeded boards shared by all benchmarks"""
+
+    def __init__(self, seed=0, num_boards=50):
+        self.seed = seed
+        self.boards = [setup_game(seed=seed + i)[0] for i in range(num_boards)]
+        self.board_words = [[w for w, _ in board] for board in self.boards]
+        self.rng = random.Random(seed)
+
+    def board(self, i):
+        return self.boards[i % len(self.boards)]
+
+    def words(self, i):
+        return self.board_words[i % len(self.board_words)]
+
+    def roles(self, i):
+        """(targets, avoid, assassins) for red on board i"""
+        board = self.board(i)
+        targets = [w for w, c in board if c == 'red']
+        avoid = [w for w, c in board if c in ('blue', 'neutral')]
+        assassins = [w for w, c in board if c == 'assassin']
+        return targets, avoid, assassins
+
+
+# ============================================
+# BENCHMARKS
+# Each returns (prepare, op): prepare(i) builds untimed arguments for
+# iteration i (or is None), op(*args) is the timed call.
+# ============================================
+
+def bench_setup_game(ctx):
+    return None, lambda: setup_game(seed=ctx.rng.randrange(1 << 30))
+
+
+def bench_make_guess(ctx):
+    def prepare(i):
+        board = ctx.board(i)
+        return CodenamesGame(board, 'red'), board[i % len(board)][0]
+    return prepare, lambda game, word: game.make_guess(word)
+
+
+def bench_get_counts(ctx):
+    def prepare(i):
+        game = CodenamesGame(ctx.board(i), 'red')
+        for word, _ in ctx.board(i)[:5]:
+            game.make_guess(word)
+        return (game,)
+    return prepare, lambda game: game.get_counts()
+
+
+def bench_is_illegal_clue(ctx):
+    clues = ctx.rng.sample(load_noun_pool(), 200)
+    return (lambda i: (clues[i % len(clues)], ctx.words(i))), is_illegal_clue
+
+
+def bench_legality_index(ctx):
+    clues = ctx.rng.sample(load_noun_pool(), 200)
+    indexes = [BoardLegalityIndex(words) for words in ctx.board_words]
+    return (
+        lambda i: (indexes[i % len(indexes)], clues[i % len(clues)]),
+        lambda index, clue: index.is_illegal(clue),
+    )
+
+
+def bench_generate_clues_for_word(ctx):
+    return (lambda i: (ctx.words(i)[i % 25], ctx.words(i))), generate_clues_for_word
+
+
+def bench_generate_all_clues(ctx):
+    return (lambda i: (ctx.roles(i)[0], ctx.words(i))), generate_all_clues
+
+
+def bench_score_clues(ctx):
+    def prepare(i):
+        targets, avoid, assassins = ctx.roles(i)
+        return generate_all_clues(targets, ctx.words(i)), targets, avoid, assassins
+    return prepare, score_clues
+
+
+def bench_score_clues_2000(ctx):
+    clues = ctx.rng.sample(sorted(codenames_embeddings.get_model().key_to_index), 2000)
+    return (lambda i: (clues,) + ctx.roles(i)), score_clues
+
+
+def bench_score_mode(ctx, mode):
+    """One scoring mode over a shared 2000-clue similarity matrix (no model lookups timed)"""
+    clues = ctx.rng.sample(sorted(codenames_embeddings.get_model().key_to_index), 2000)
+    def prepare(i):
+        targets, avoid, assassins = ctx.roles(i)
+        return similarity_matrix(clues, targets + avoid + assassins), len(targets), len(avoid)
+    return prepare, functools.partial(score_matrix, mode=mode)
+
+
+def bench_top_clues_2000(ctx):
+    """Same inputs as score_clues_2000, streamed into a top-5 heap"""
+    clues = ctx.rng.sample(sorted(codenames_embeddings.get_model().key_to_index), 2000)
+    return (lambda i: (clues,) + ctx.roles(i)), lambda *args: list(top_clues(*args))
+
+
+def bench_wup_matrix(ctx):
+    """Wu-Palmer block for a board's clue candidates (hybrid scoring)"""
+    table = load_wup_table()
+    def prepare(i):
+        return sorted(generate_all_clues(ctx.roles(i)[0], ctx.words(i))), ctx.words(i)
+    return prepare, table.matrix
+
+
+def bench_suggest_clues_cold(ctx):
+    return (lambda i: (CodenamesGame(ctx.board(i), 'red'),)), suggest_clues
+
+
+def bench_suggest_clues_warm(ctx):
+    """Follow-up requests on the same games (per-board similarity cache)"""
+    games = [CodenamesGame(board, 'red') for board in ctx.boards]
+    return (lambda i: (games[i % len(games)],)), suggest_clues
+
+
+def bench_suggest_clues_precomputed(ctx):
+    """First request on a fresh game whose board table was built at creation"""
+    def prepare(i):
+        game = CodenamesGame(*setup_game(seed=ctx.seed + 10_000 + i))
+        precompute_suggestions(game, wait=True)
+        return (game,)
+    return prepare, suggest_clues
+
+
+def bench_suggest_batch(ctx):
+    """All boards in one call, fresh games each time"""
+    return (lambda i: ([CodenamesGame(board, 'red') for board in ctx.boards],)), suggest_batch
+
+
+BENCHMARKS = {
+    'setup_game': bench_setup_game,
+    'make_guess': bench_make_guess,
+    'get_counts': bench_get_counts,
+    'is_illegal_clue': bench_is_illegal_clue,
+    'legality_index': bench_legality_index,
+    'generate_clues_for_word': bench_generate_clues_for_word,
+    'generate_all_clues': bench_generate_all_clues,
+    'score_clues': bench_score_clues,
+    'score_clues_2000': bench_score_clues_2000,
+    'top_clues_2000': bench_top_clues_2000,
+    'wup_matrix': bench_wup_matrix,
+    'suggest_clues_cold': bench_suggest_clues_cold,
+    'suggest_clues_warm': bench_suggest_clues_warm,
+    'suggest_clues_precomputed': bench_suggest_clues_precomputed,
+    'suggest_batch': bench_suggest_batch,
+}
+for _mode in SCORING_MODES:
+    BENCHMARKS[f'score_mode_{_mode}'] = functools.partial(bench_score_mode, mode=_mode)
+
+
+# ============================================
+# HARNESS
+# ============================================
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(prepare, op, iterations, warmup=5, alloc_iterations=20):
+    """Per-call latency (us) and peak traced allocation (bytes) of op"""
+    args_for = prepare or (lambda i: ())
+    for i in range(warmup):
+        op(*args_for(i))
+
+    times = []
+    for i in range(iterations):
+        args = args_for(i)
+        start = time.perf_counter_ns()
+        op(*args)
+        times.append((time.perf_counter_ns() - start) / 1000)
+    times.sort()
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(alloc_iterations):
+            args = args_for(i)
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            op(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_us': percentile(times, 0.50),
+        'p95_us': percentile(times, 0.95),
+        'mean_us': statistics.fmean(times),
+        'alloc_peak_bytes': int(statistics.median(peaks)),
+    }
+
+
+def run(names=None, iterations=200, seed=0, synthetic=True):
+    if synthetic:
+        codenames_embeddings.set_model(synthetic_store(seed=seed))
+    load_clue_index()
+    ctx = Context(seed=seed)
+
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        prepare, op = factory(ctx)
+        results[name] = measure(prepare, op, iterations)
+    return {
+        'format': BENCH_FORMAT,
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+            'synthetic_embeddings': synthetic,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+# ============================================
+# QUANTIZATION CHECK
+# ============================================
+
+def top_suggestions(boards, top_k=5):
+    """Top-k suggested clues per board with the current model (fresh games)"""
+    return [
+        [clue for clue, _, _, _ in suggest_clues(CodenamesGame(board, 'red'), top_k=top_k)]
+        for board in boards
+    ]
+
+
+def quantization_agreement(reference, dtype='int8', num_boards=200, seed=0, top_k=5):
+    """Top-k suggestion agreement and similarity error of a quantized copy of reference"""
+    quantized = VectorStore.quantize(reference, dtype)
+    boards = [setup_game(seed=seed + i)[0] for i in range(num_boards)]
+    rng = np.random.default_rng(seed)
+    words = [reference.index_to_key[i] for i in rng.choice(len(reference.index_to_key), 500)]
+    try:
+        codenames_embeddings.set_model(reference)
+        expected = top_suggestions(boards, top_k)
+        exact = cosine_matrix(reference, words, words)
+        codenames_embeddings.set_model(quantized)
+        actual = top_suggestions(boards, top_k)
+        approx = cosine_matrix(quantized, words, words)
+    finally:
+        codenames_embeddings.set_model(reference)
+
+    pairs = [(e, a) for e, a in zip(expected, actual) if e]
+    return {
+        'dtype': dtype,
+        'boards': len(pairs),
+        'top_k': top_k,
+        'top1_agreement': statistics.fmean(bool(a) and e[0] == a[0] for e, a in pairs),
+        'topk_overlap': statistics.fmean(len(set(e) & set(a)) / len(e) for e, a in pairs),
+        'topk_exact': statistics.fmean(e == a for e, a in pairs),
+        'max_cosine_error': float(np.abs(exact - approx).max()),
+        'reference_bytes': int(np.asarray(reference.vectors).nbytes),
+        'quantized_bytes': int(quantized.nbytes),
+    }
+
+
+def compare(baseline, current, threshold=0.10, metric='p50_us'):
+    """Rows of (name, old, new, ratio, regressed) for benchmarks in both files"""
+    rows = []
+    for name, old in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            continue
+        ratio = new[metric] / old[metric] if old[metric] else float('inf')
+        rows.append((name, old[metric], new[metric], ratio, ratio > 1 + threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Codenames benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_cmd = commands.add_parser('run', help="run benchmarks and write JSON")
+    run_cmd.add_argument('--output', help="JSON file (default: stdout)")
+    run_cmd.add_argument('--iterations', type=int, default=200)
+    run_cmd.add_argument('--seed', type=int, default=0)
+    run_cmd.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="subset to run")
+    run_cmd.add_argument('--real-model', action='store_true',
+                         help="use the configured embedding model instead of the synthetic fixture")
+
+    compare_cmd = commands.add_parser('compare', help="diff two result files")
+    compare_cmd.add_argument('baseline')
+    compare_cmd.add_argument('current')
+    compare_cmd.add_argument('--threshold', type=float, default=0.10,
+                             help="flag slowdowns above this fraction (default 0.10)")
+    compare_cmd.add_argument('--metric', default='p50_us', choices=['p50_us', 'p95_us', 'mean_us'])
+
+    quant_cmd = commands.add_parser('quantization', help="check quantized models against float32")
+    quant_cmd.add_argument('--dtype', nargs='+', default=['int8'], choices=['float16', 'int8'])
+    quant_cmd.add_argument('--boards', type=int, default=200)
+    quant_cmd.add_argument('--seed', type=int, default=0)
+    quant_cmd.add_argument('--top-k', type=int, default=5)
+    quant_cmd.add_argument('--min-overlap', type=float, default=0.9,
+                           help="fail if mean top-k overlap drops below this (default 0.9)")
+    quant_cmd.add_argument('--real-model', action='store_true',
+                           help="use the configured embedding model instead of the synthetic fixture")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        report = run(args.only, args.iterations, args.seed, synthetic=not args.real_model)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+        for name, r in report['results'].items():
+            print(f"{name:<26} p50 {r['p50_us']:10.1f} us  p95 {r['p95_us']:10.1f} us"
+                  f"  peak {r['alloc_peak_bytes'] / 1024:8.1f} KiB", file=sys.stderr)
+    elif args.command == 'quantization':
+        load_clue_index()
+        reference = (codenames_embeddings.get_model() if args.real_model
+                     else synthetic_store(seed=args.seed))
+        if isinstance(reference, VectorStore) and reference.dtype != 'float32':
+            reference = VectorStore.quantize(reference, 'float32')
+        reports = [
+            quantization_agreement(reference, dtype, args.boards, args.seed, args.top_k)
+            for dtype in args.dtype
+        ]
+        print(json.dumps(reports, indent=2))
+        for r in reports:
+            print(f"{r['dtype']:<8} top-1 {r['top1_agreement']:6.1%}  top-{r['top_k']} overlap"
+                  f" {r['topk_overlap']:6.1%}  exact {r['topk_exact']:6.1%}"
+                  f"  max |dcos| {r['max_cosine_error']:.4f}"
+                  f"  {r['reference_bytes'] / 2**20:.1f} -> {r['quantized_bytes'] / 2**20:.1f} MiB",
+                  file=sys.stderr)
+        sys.exit(1 if any(r['topk_overlap'] < args.min_overlap for r in reports) else 0)
+    else:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.threshold, args.metric)
+        for name, old, new, ratio, regressed in rows:
+            flag = 'SLOWER' if regressed else ''
+            print(f"{name:<26} {old:10.1f} -> {new:10.1f} us  x{ratio:5.2f}  {flag}")
+        sys.exit(1 if any(r[4] for r in rows) else 0)
@@ -0,0 +1,189 @@
+"""Persistent cache of clue suggestions, keyed by board state.
+
+Replays, self-play and reopened popups keep asking for suggestions on
+board states that were already solved. Results are stored in one SQLite
+database (WAL mode, so any number of processes can read while one writes)
+under a content hash of everything that decides them:
+
+    board words, the current team's targets, opponent / neutral / assassin
+    words, suggest_clues() options, the embedding model, the WordNet data
+    and the hybrid wordnet weight
+
+The database is bounded to max_entries rows; the least recently used ones
+are evicted. Enable it for every process with
+
+    CODENAMES_SUGGESTION_CACHE=1 python codenames_sim.py ...        # default path
+    CODENAMES_SUGGESTION_CACHE=/tmp/s.sqlite python codenames_gui.py
+
+or in code with codenames_game.set_suggestion_cache(SuggestionCache(path)).
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from codenames_artifacts import cache_dir, wordnet_fingerprint
+from codenames_embeddings import get_model, model_fingerprint
+from codenames_game import get_wordnet_weight, suggestion_roles
+from codenames_profiling import instrumentation
+
+SUGGESTION_CACHE_ENV = 'CODENAMES_SUGGESTION_CACHE'
+
+# Bump when the key layout or the meaning of a stored result changes
+SUGGESTION_CACHE_VERSION = 1
+
+# A hit only rewrites its LRU timestamp when it is older than this, so hot
+# entries don't turn every read into a write
+TOUCH_INTERVAL = 60.0
+
+# Inserts between size checks. Every process also checks on its first
+# insert, so short-lived ones (a GUI session, a small sim run) still trim
+# the table; it can exceed max_entries by at most this many rows per writer
+EVICT_EVERY = 256
+
+
+@functools.lru_cache(maxsize=None)
+def _wordnet_fingerprint():
+    return wordnet_fingerprint()
+
+
+def default_path():
+    return os.path.join(cache_dir(), f"suggestions-v{SUGGESTION_CACHE_VERSION}.sqlite")
+
+
+# ============================================
+# CACHE
+# ============================================
+
+class SuggestionCache:
+    """suggest_clues() results in a size-bounded SQLite table; safe across threads and processes"""
+
+    def __init__(self, path=None, max_entries=200_000):
+        self.path = path or default_path()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()  # one connection per thread (and per process)
+        self._lock = threading.Lock()
+        self._inserts = (None, 0)  # (pid, inserts made by that process)
+        self._model = None
+        self._model_fingerprint = None
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # Never reuse a connection inherited through fork
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS suggestions ('
+                'key BLOB PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL) WITHOUT ROWID'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS suggestions_used ON suggestions (used)')
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _fingerprint(self):
+        model = get_model()
+        if model is not self._model:
+            self._model_fingerprint = model_fingerprint(model)
+            self._model = model
+        return self._model_fingerprint
+
+    def key(self, game, options):
+        """Content hash of a game's suggestion inputs; options is a tuple of suggest_clues() arguments"""
+        targets, avoids, assassins = suggestion_roles(game)
+        opponent = 'blue' if game.current_team == 'red' else 'red'
+        parts = (
+            SUGGESTION_CACHE_VERSION,
+            self._fingerprint(),
+            _wordnet_fingerprint(),
+            get_wordnet_weight(),
+            options,
+            # Revealed words still make clues illegal, so the whole board counts
+            sorted(game.layout.words),
+            sorted(targets),
+            sorted(game.get_unrevealed_by_color(opponent)),
+            sorted(game.get_unrevealed_by_color('neutral')),
+            sorted(assassins),
+        )
+        return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key):
+        """Stored suggestions for key, or None"""
+        row = self._connection().execute(
+            'SELECT value, used FROM suggestions WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            instrumentation.count('suggestion_cache_misses')
+            return None
+        self.hits += 1
+        instrumentation.count('suggestion_cache_hits')
+        value, used = row
+        now = time.time()
+        if now - used > TOUCH_INTERVAL:
+            try:
+                self._connection().execute('UPDATE suggestions SET used = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                pass  # Busy writer: the timestamp is only an eviction hint
+        return [(clue, n, tuple(targets), margin) for clue, n, targets, margin in json.loads(value)]
+
+    def put(self, key, suggestions):
+        value = json.dumps([[clue, n, list(targets), margin] for clue, n, targets, margin in suggestions])
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO suggestions (key, value, used) VALUES (?, ?, ?)',
+            (key, value, time.time()),
+        )
+        with self._lock:
+            pid, count = self._inserts
+            count = count + 1 if pid == os.getpid() else 1
+            self._inserts = (os.getpid(), count)
+            check = (count - 1) % EVICT_EVERY == 0
+        if check:
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used rows beyond max_entries"""
+        conn = self._connection()
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM suggestions WHERE key IN '
+                '(SELECT key FROM suggestions ORDER BY used LIMIT ?)', (excess,)
+            )
+        return max(excess, 0)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM suggestions')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM suggestions').fetchone()[0]
+
+    def stats(self):
+        return {'path': self.path, 'entries': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+def default_suggestion_cache():
+    """SuggestionCache from $CODENAMES_SUGGESTION_CACHE ('1' = default path), or None"""
+    value = os.environ.get(SUGGESTION_CACHE_ENV)
+    if not value or value == '0':
+        return None
+    return SuggestionCache(None if value == '1' else value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the suggestion cache")
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--path', help="database file (default: in $CODENAMES_CACHE_DIR)")
+    args = parser.parse_args()
+    cache = SuggestionCache(args.path)
+    if args.command == 'clear':
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
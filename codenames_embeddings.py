@@ -0,0 +1,363 @@
+"""Word embeddings used by the clue AI.
+
+Nothing is loaded at import time. The model is resolved on first use through a
+shared EmbeddingProvider, which can be warmed up in the background and pointed
+at a different backend (e.g. a small local vector file for tests or offline
+hosts).
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from codenames_profiling import instrumentation
+
+DEFAULT_MODEL = 'glove-wiki-gigaword-100'
+
+# Set to a word2vec/GloVe text file to use it instead of the downloader model
+VECTORS_ENV = 'CODENAMES_VECTORS'
+# Set to a directory written by build_vector_store() to memory-map it instead
+VECTOR_STORE_ENV = 'CODENAMES_VECTOR_STORE'
+
+STORE_VECTORS = 'vectors.npy'
+STORE_SCALES = 'scales.npy'
+STORE_VOCAB = 'vocab.txt'
+STORE_META = 'meta.json'
+# int8 stores keep one float32 scale per row (vector ~= codes * scale)
+STORE_DTYPES = ('float32', 'float16', 'int8')
+
+
+# ============================================
+# BACKENDS (callables returning a model)
+# ============================================
+
+def load_downloader_model(name=DEFAULT_MODEL):
+    """Load a pretrained model through gensim's downloader (slow, ~128 MB)"""
+    import gensim.downloader as api
+    return api.load(name)
+
+
+def load_vector_file(path, binary=False):
+    """Load a word2vec or headerless GloVe vector file"""
+    from gensim.models import KeyedVectors
+
+    no_header = False
+    if not binary:
+        with open(path, encoding='utf-8') as f:
+            first = f.readline().split()
+        no_header = not (len(first) == 2 and all(p.isdigit() for p in first))
+    return KeyedVectors.load_word2vec_format(path, binary=binary, no_header=no_header)
+
+
+def load_vector_store(path):
+    return VectorStore.load(path)
+
+
+def default_loader():
+    """
+    $CODENAMES_VECTOR_STORE if set, else the file in $CODENAMES_VECTORS,
+    else the GloVe download
+    """
+    path = os.environ.get(VECTOR_STORE_ENV)
+    if path:
+        return load_vector_store(path)
+    path = os.environ.get(VECTORS_ENV)
+    if path:
+        return load_vector_file(path)
+    return load_downloader_model()
+
+
+# ============================================
+# COMPACT ON-DISK STORE
+# ============================================
+
+def quantize_rows(vectors, dtype):
+    """(stored matrix, per-row scales or None) for one of STORE_DTYPES"""
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"dtype must be one of {STORE_DTYPES}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != 'int8':
+        return vectors.astype(dtype), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class VectorStore:
+    """
+    Read-only word vectors backed by a (usually memory-mapped) array.
+
+    Implements the part of gensim's KeyedVectors interface the scorer uses.
+    Loaded stores are np.memmap views, so every process that opens the same
+    store shares one page-cache copy instead of holding a private matrix.
+
+    vectors may be float32, float16 or int8 codes with per-row scales. The
+    scorer only needs directions, so it works on the stored codes as they
+    are (see unit_vectors); item access returns dequantized float32.
+    """
+
+    def __init__(self, words, vectors, scales=None):
+        self.index_to_key = list(words)
+        self.key_to_index = {w: i for i, w in enumerate(self.index_to_key)}
+        self.vectors = vectors
+        self.scales = scales
+        self.vector_size = vectors.shape[1]
+
+    @classmethod
+    def quantize(cls, model, dtype='int8'):
+        """In-memory copy of any model (KeyedVectors or store) stored as dtype"""
+        vectors, scales = quantize_rows(dequantized(model), dtype)
+        return cls(model.index_to_key, vectors, scales)
+
+    @property
+    def dtype(self):
+        return self.vectors.dtype.name
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self):
+        return len(self.index_to_key)
+
+    def __contains__(self, word):
+        return word in self.key_to_index
+
+    def __getitem__(self, word):
+        i = self.key_to_index[word]
+        vector = np.asarray(self.vectors[i], dtype=np.float32)
+        return vector * self.scales[i] if self.scales is not None else vector
+
+    def similarity(self, w1, w2):
+        """Cosine similarity; raises KeyError for unknown words like KeyedVectors"""
+        v1, v2 = self[w1], self[w2]
+        return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+
+    def save(self, path, dtype=None, source=None):
+        """Write the store, re-quantizing if dtype differs from the stored one"""
+        dtype = dtype or self.dtype
+        if dtype == self.dtype:
+            vectors, scales = self.vectors, self.scales
+        else:
+            vectors, scales = quantize_rows(dequantized(self), dtype)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, STORE_VECTORS), np.asarray(vectors))
+        if scales is not None:
+            np.save(os.path.join(path, STORE_SCALES), np.asarray(scales))
+        with open(os.path.join(path, STORE_VOCAB), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.index_to_key))
+        with open(os.path.join(path, STORE_META), 'w', encoding='utf-8') as f:
+            json.dump({
+                'words': len(self),
+                'dim': self.vector_size,
+                'dtype': dtype,
+                'source': source,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        vectors = np.load(os.path.join(path, STORE_VECTORS), mmap_mode='r')
+        scales = None
+        if vectors.dtype == np.int8:
+            scales = np.load(os.path.join(path, STORE_SCALES), mmap_mode='r')
+        with open(os.path.join(path, STORE_VOCAB), encoding='utf-8') as f:
+            words = f.read().split('\n')
+        if len(words) != len(vectors):
+            raise ValueError(f"{path}: vocabulary and vector counts differ")
+        return cls(words, vectors, scales)
+
+
+def dequantized(model):
+    """The model's vectors as float32 (applying int8 scales)"""
+    vectors = np.asarray(model.vectors, dtype=np.float32)
+    scales = getattr(model, 'scales', None)
+    return vectors * np.asarray(scales)[:, None] if scales is not None else vectors
+
+
+def wordnet_vocabulary():
+    """Lowercased WordNet lemma names plus the parts of compound lemmas"""
+    from codenames_game import breakapart_compound_word, get_wordnet
+
+    vocab = set()
+    for name in get_wordnet().all_lemma_names():
+        name = name.lower()
+        vocab.add(name)
+        vocab.update(breakapart_compound_word(name))
+    return vocab
+
+
+def build_vector_store(path, model=None, dtype='float32', vocabulary=None):
+    """
+    One-time build step: write the model, trimmed to words reachable from
+    WordNet lemmas, as a compact store of unit-normalized vectors.
+    """
+    if model is None:
+        model = get_model()
+    if vocabulary is None:
+        vocabulary = wordnet_vocabulary()
+    words = [w for w in model.key_to_index if w in vocabulary]
+    vectors, _ = unit_vectors(model, words)
+    store = VectorStore(words, vectors)
+    store.save(path, dtype=dtype, source=f"{type(model).__name__}[{len(model.key_to_index)}]")
+    return store
+
+
+# ============================================
+# BATCH LOOKUPS
+# ============================================
+
+def unit_vectors(model, words):
+    """
+    Unit-length vectors for words (lowercased). Returns (matrix, in_vocab).
+
+    Out-of-vocabulary words get an all-zero row, so every similarity against
+    them comes out as 0.0 - the same value the scalar path uses for KeyError.
+
+    Quantized stores are read as they are: only the gathered rows are cast to
+    float32, and int8 per-row scales cancel in the normalization, so no
+    dequantized copy of the matrix is ever made.
+    """
+    key_to_index = model.key_to_index
+    idx = np.fromiter(
+        (key_to_index.get(w.lower(), -1) for w in words), dtype=np.int64, count=len(words)
+    )
+    in_vocab = idx >= 0
+    if instrumentation.enabled:
+        instrumentation.count('embedding_lookups', len(words))
+        instrumentation.count('oov_lookups', int(len(words) - in_vocab.sum()))
+    matrix = np.zeros((len(words), model.vector_size), dtype=np.float32)
+    rows = np.asarray(model.vectors[idx[in_vocab]], dtype=np.float32)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix[in_vocab] = rows / norms
+    return matrix, in_vocab
+
+
+def model_fingerprint(model):
+    """Short hash identifying a model's vocabulary and (a sample of) its vectors"""
+    words = model.index_to_key
+    digest = hashlib.sha1(f"{len(words)}:{model.vector_size}:{words[0]}:{words[-1]}".encode())
+    step = max(1, len(words) // 1000)
+    digest.update(np.ascontiguousarray(model.vectors[::step], dtype=np.float32).tobytes())
+    return digest.hexdigest()[:12]
+
+
+def known_words(model, words):
+    """The words (in order) that have a vector in model"""
+    key_to_index = model.key_to_index
+    return [w for w in words if w.lower() in key_to_index]
+
+
+def cosine_matrix(model, words_a, words_b):
+    """Cosine similarity of every word in words_a against every word in words_b"""
+    vectors_a, _ = unit_vectors(model, words_a)
+    vectors_b, _ = unit_vectors(model, words_b)
+    return vectors_a @ vectors_b.T
+
+
+# ============================================
+# PROVIDER
+# ============================================
+
+class EmbeddingProvider:
+    """Lazily loads one shared model; safe to call from any thread"""
+
+    def __init__(self, loader=None):
+        self._loader = loader or default_loader
+        self._model = None
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    def set_backend(self, loader):
+        """Replace the loader; the model is reloaded on next use"""
+        with self._lock:
+            self._loader = loader
+            self._model = None
+
+    def set_model(self, model):
+        """Inject an already-loaded model"""
+        with self._lock:
+            self._model = model
+
+    def use_vector_file(self, path, binary=False):
+        self.set_backend(lambda: load_vector_file(path, binary=binary))
+
+    def use_vector_store(self, path):
+        self.set_backend(lambda: load_vector_store(path))
+
+    def is_loaded(self):
+        return self._model is not None
+
+    def get(self):
+        """Return the model, loading it on first call"""
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            if self._model is None:
+                self._model = self._loader()
+            return self._model
+
+    def warm_up(self):
+        """Start loading the model on a daemon thread. Returns the thread."""
+        with self._lock:
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmup_thread = threading.Thread(
+                    target=self._warm_up, name='embedding-warmup', daemon=True
+                )
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except Exception:
+            # Leave the model unloaded; the next get() retries and raises
+            pass
+
+
+provider = EmbeddingProvider()
+
+
+def get_model():
+    return provider.get()
+
+
+def warm_up():
+    return provider.warm_up()
+
+
+def set_backend(loader):
+    provider.set_backend(loader)
+
+
+def set_model(model):
+    provider.set_model(model)
+
+
+def use_vector_file(path, binary=False):
+    provider.use_vector_file(path, binary=binary)
+
+
+def use_vector_store(path):
+    provider.use_vector_store(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding store tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build-store', help="write a trimmed, mmap-able vector store")
+    build.add_argument('path', help="output directory")
+    build.add_argument('--dtype', choices=STORE_DTYPES, default='float32')
+    build.add_argument('--vectors', help="source vector file (default: configured model)")
+
+    args = parser.parse_args()
+    if args.vectors:
+        use_vector_file(args.vectors)
+    store = build_vector_store(args.path, dtype=args.dtype)
+    print(f"Wrote {len(store)} x {store.vector_size} ({args.dtype}) to {args.path}")
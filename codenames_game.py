@@ -1,55 +1,185 @@
-from nltk.stem import PorterStemmer
-from nltk.corpus import wordnet as wn
-from nltk.corpus import stopwords
-import nltk
-import gensim.downloader as api
-import regex as re
+import functools
+import heapq
+import itertools
+import json
 import random
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import regex as re
+
+from codenames_embeddings import cosine_matrix, get_model, known_words, unit_vectors
+from codenames_profiling import instrumentation
+
+# NLTK and the embedding model are slow to import/load, so they are resolved
+# on first use. Pure game logic never touches them.
+
+@functools.lru_cache(maxsize=None)
+def get_stemmer():
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+@functools.lru_cache(maxsize=None)
+def get_wordnet():
+    from nltk.corpus import wordnet
+    return wordnet
+
+@functools.lru_cache(maxsize=None)
+def get_stopwords():
+    import nltk
+    from nltk.corpus import stopwords
+    try:
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        nltk.download('stopwords')
+        return frozenset(stopwords.words('english'))
 
-stemmer = PorterStemmer()
-glove_wiki_model = api.load('glove-wiki-gigaword-100')
+_LAZY_GLOBALS = {
+    'stemmer': get_stemmer,
+    'wn': get_wordnet,
+    'STOPWORDS': get_stopwords,
+    'glove_wiki_model': get_model,
+}
 
-try:
-    STOPWORDS = set(stopwords.words('english'))
-except:
-    nltk.download('stopwords')
-    STOPWORDS = set(stopwords.words('english'))
+def __getattr__(name):
+    # Keeps the old module-level names working without loading at import time
+    if name in _LAZY_GLOBALS:
+        return _LAZY_GLOBALS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================
 # CORE GAME LOGIC (No input/output)
 # ============================================
 
+COLORS = ('red', 'blue', 'neutral', 'assassin')
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+RED, BLUE, NEUTRAL, ASSASSIN = range(len(COLORS))
+
+class BoardLayout:
+    """
+    Immutable per-board lookup tables, shared by every game on that board:
+    word -> index (case-insensitive), one color code per card, and the card
+    indices of each color. Also owns the per-board legality index,
+    similarity cache and per-word clue candidates, built on first use (or
+    ahead of time by precompute_suggestions()).
+    """
+    __slots__ = ('board', 'words', 'index', 'colors', 'by_color', 'color_counts',
+                 '_legality', '_similarity_cache', '_encoded', '_word_clues', '_precompute')
+    
+    def __init__(self, board):
+        self.board = board
+        self.words = tuple(w for w, _ in board)
+        self.colors = bytes(COLOR_CODES[c] for _, c in board)
+        self.index = {}
+        for i, word in enumerate(self.words):
+            self.index.setdefault(word.lower(), i)
+        self.by_color = tuple(
+            tuple(i for i, c in enumerate(self.colors) if c == code) for code in range(len(COLORS))
+        )
+        self.color_counts = tuple(len(ids) for ids in self.by_color)
+        self._legality = None
+        self._similarity_cache = None
+        self._encoded = None
+        self._word_clues = {}  # board word -> legal hypernym clue candidates
+        self._precompute = None
+    
+    @property
+    def legality(self):
+        if self._legality is None:
+            self._legality = BoardLegalityIndex(self.words)
+        return self._legality
+    
+    def clues_for(self, word):
+        """generate_clues_for_word() on this board, memoized per word"""
+        clues = self._word_clues.get(word)
+        if clues is None:
+            clues = self._word_clues[word] = frozenset(generate_clues_for_word(word, self.legality))
+        return clues
+    
+    @property
+    def similarity_cache(self):
+        if self._similarity_cache is None:
+            self._similarity_cache = BoardSimilarityCache(self.words)
+        return self._similarity_cache
+
 class CodenamesGame:
     """Pure game state and logic - no I/O"""
+    # Many games are held at once by self-play and the server, so the state
+    # is a revealed bitmask plus remaining counts over a shared BoardLayout
+    __slots__ = (
+        'layout', 'current_team', 'revealed_mask', 'remaining', 'game_over', 'winner',
+        'current_clue', 'current_n', 'guesses_made',
+    )
     
-    def __init__(self, board=None, starting_team=None):
+    def __init__(self, board=None, starting_team=None, seed=None, precompute=False):
         if board is None:
-            board, starting_team = setup_game()
+            board, starting_team = setup_game(seed=seed)
         
-        self.board = board  # List of (word, color) tuples
+        self.layout = board if isinstance(board, BoardLayout) else BoardLayout(board)
         self.current_team = starting_team
-        self.revealed = set()
+        self.revealed_mask = 0  # bit i set = card i revealed
+        self.remaining = list(self.layout.color_counts)  # unrevealed cards per color code
         self.game_over = False
         self.winner = None
         self.current_clue = None
         self.current_n = 0
         self.guesses_made = 0
+        if precompute:
+            precompute_suggestions(self)
+    
+    @property
+    def board(self):
+        """List of (word, color) tuples"""
+        return self.layout.board
+    
+    @property
+    def revealed(self):
+        """Set of revealed board words (a snapshot; use is_revealed for lookups)"""
+        words = self.layout.words
+        mask = self.revealed_mask
+        return {words[i] for i in range(len(words)) if mask >> i & 1}
+    
+    def is_revealed(self, word):
+        i = self.layout.index.get(word.lower())
+        return i is not None and bool(self.revealed_mask >> i & 1)
+    
+    @property
+    def legality(self):
+        """BoardLegalityIndex for this board, built on first use"""
+        return self.layout.legality
+    
+    @property
+    def similarity_cache(self):
+        """BoardSimilarityCache for this board, carried across turns"""
+        return self.layout.similarity_cache
+    
+    def copy(self):
+        """Independent copy of the mutable state (the board layout and its caches are shared)"""
+        other = CodenamesGame(self.layout, self.current_team)
+        other.revealed_mask = self.revealed_mask
+        other.remaining = list(self.remaining)
+        other.game_over = self.game_over
+        other.winner = self.winner
+        other.current_clue = self.current_clue
+        other.current_n = self.current_n
+        other.guesses_made = self.guesses_made
+        return other
     
     def get_unrevealed_by_color(self, color):
         """Get unrevealed words of a specific color"""
-        return [w for w, c in self.board if c == color and w not in self.revealed]
+        words = self.layout.words
+        mask = self.revealed_mask
+        return [words[i] for i in self.layout.by_color[COLOR_CODES[color]] if not mask >> i & 1]
     
     def get_all_words(self):
         """Get all board words"""
-        return [w for w, c in self.board]
+        return list(self.layout.words)
     
     def get_counts(self):
         """Count remaining words by color"""
-        counts = {'red': 0, 'blue': 0, 'neutral': 0, 'assassin': 0}
-        for word, color in self.board:
-            if word not in self.revealed:
-                counts[color] += 1
-        return counts
+        return dict(zip(COLORS, self.remaining))
     
     def make_guess(self, word):
         """
@@ -59,25 +189,23 @@ class CodenamesGame:
         color: color of guessed word (or None)
         message: description of what happened
         """
-        # Check if word on board
-        word_color = None
-        for w, c in self.board:
-            if w.lower() == word.lower():
-                word_color = c
-                break
-        
-        if word_color is None:
+        i = self.layout.index.get(word.lower())
+        if i is None:
             return False, None, "Word not on board"
         
-        if word in self.revealed:
+        bit = 1 << i
+        if self.revealed_mask & bit:
             return False, None, "Already revealed"
         
         # Reveal the word
-        self.revealed.add(word)
+        self.revealed_mask |= bit
+        code = self.layout.colors[i]
+        self.remaining[code] -= 1
         self.guesses_made += 1
+        word_color = COLORS[code]
         
         # Check results
-        if word_color == 'assassin':
+        if code == ASSASSIN:
             opponent = 'blue' if self.current_team == 'red' else 'red'
             self.game_over = True
             self.winner = opponent
@@ -85,16 +213,16 @@ class CodenamesGame:
         
         if word_color == self.current_team:
             # Check if team won
-            if not self.get_unrevealed_by_color(self.current_team):
+            if not self.remaining[code]:
                 self.game_over = True
                 self.winner = self.current_team
                 return True, word_color, "Correct! Team wins!"
             return True, word_color, "Correct!"
         
         # Wrong color - check if opponent won
-        if word_color != 'neutral':
+        if code != NEUTRAL:
             opponent = 'blue' if self.current_team == 'red' else 'red'
-            if not self.get_unrevealed_by_color(opponent):
+            if not self.remaining[code]:
                 self.game_over = True
                 self.winner = opponent
                 return True, word_color, f"Wrong! {opponent} wins!"
@@ -124,19 +252,265 @@ class CodenamesGame:
         if self.guesses_made >= self.current_n:
             return True
         return False
+    
+    def to_bytes(self):
+        """Compact versioned binary snapshot (see SERIALIZATION below)"""
+        return encode_game(self)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        return decode_game(data)
+    
+    def to_dict(self):
+        """JSON-friendly snapshot, for debugging and logs"""
+        return {
+            'version': STATE_FORMAT_VERSION,
+            'board': [list(card) for card in self.board],
+            'current_team': self.current_team,
+            'revealed': [w for w in self.layout.words if self.is_revealed(w)],
+            'game_over': self.game_over,
+            'winner': self.winner,
+            'current_clue': self.current_clue,
+            'current_n': self.current_n,
+            'guesses_made': self.guesses_made,
+        }
+    
+    @classmethod
+    def from_dict(cls, state):
+        if state.get('version') != STATE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported game state version: {state.get('version')!r}")
+        game = cls([tuple(card) for card in state['board']], state['current_team'])
+        game._restore(
+            sum(1 << game.layout.index[w.lower()] for w in set(state['revealed'])),
+            state['game_over'], state['winner'],
+            state['current_clue'], state['current_n'], state['guesses_made'],
+        )
+        return game
+    
+    def to_json(self):
+        return json.dumps(self.to_dict())
+    
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+    
+    def _restore(self, revealed_mask, game_over, winner, clue, n, guesses_made):
+        self.revealed_mask = revealed_mask
+        self.remaining = list(self.layout.color_counts)
+        for i, code in enumerate(self.layout.colors):
+            if revealed_mask >> i & 1:
+                self.remaining[code] -= 1
+        self.game_over = game_over
+        self.winner = winner
+        self.current_clue = clue
+        self.current_n = n
+        self.guesses_made = guesses_made
+
+
+# ============================================
+# SERIALIZATION
+#
+# Binary layout (little-endian), version 1:
+#   header   magic 'CN', version, flags, num_words, team, winner,
+#            current_n (u16), guesses_made (u16); team/winner are color
+#            codes, 0xFF for None
+#   board    pool mode: CRC32 of the noun pool (u32), then one u16 pool
+#            position per card; inline mode: u8 length + UTF-8 per card.
+#            Then color codes packed 2 bits per card
+#   revealed bitmask, ceil(num_words / 8) bytes
+#   clue     u16 length + UTF-8, only if FLAG_CLUE
+# ============================================
+
+STATE_MAGIC = b'CN'
+STATE_FORMAT_VERSION = 1
+FLAG_INLINE_WORDS = 1
+FLAG_GAME_OVER = 2
+FLAG_CLUE = 4
+_HEADER = struct.Struct('<2sBBBBBHH')
+_NONE_CODE = 0xFF
+
+def _pool_ids():
+    from codenames_artifacts import noun_pool_ids
+    return noun_pool_ids()
+
+def encode_board(layout):
+    """Board section bytes for a layout: word ids (or inline words) plus packed colors"""
+    ids, checksum = _pool_ids()
+    if len(ids) <= 0x10000 and all(w in ids for w in layout.words):
+        inline = False
+        words = struct.pack(f'<I{len(layout.words)}H', checksum, *(ids[w] for w in layout.words))
+    else:
+        inline = True
+        parts = []
+        for word in layout.words:
+            raw = word.encode('utf-8')
+            parts.append(bytes((len(raw),)) + raw)
+        words = b''.join(parts)
+    packed = bytearray((len(layout.colors) + 3) // 4)
+    for i, code in enumerate(layout.colors):
+        packed[i >> 2] |= code << (2 * (i & 3))
+    return inline, words + bytes(packed)
+
+def encode_game(game):
+    layout = game.layout
+    num_words = len(layout.words)
+    if num_words > 0xFF:
+        raise ValueError(f"Board too large to encode: {num_words} words")
+    if layout._encoded is None:
+        layout._encoded = encode_board(layout)
+    inline, board = layout._encoded
+    flags = (FLAG_INLINE_WORDS if inline else 0) | (FLAG_GAME_OVER if game.game_over else 0)
+    clue = b''
+    if game.current_clue is not None:
+        flags |= FLAG_CLUE
+        raw = game.current_clue.encode('utf-8')
+        clue = struct.pack('<H', len(raw)) + raw
+    header = _HEADER.pack(
+        STATE_MAGIC, STATE_FORMAT_VERSION, flags, num_words,
+        COLOR_CODES.get(game.current_team, _NONE_CODE),
+        COLOR_CODES.get(game.winner, _NONE_CODE),
+        game.current_n, game.guesses_made,
+    )
+    revealed = game.revealed_mask.to_bytes((num_words + 7) // 8, 'little')
+    return header + board + revealed + clue
+
+@functools.lru_cache(maxsize=1024)
+def _decode_board(section, num_words, inline):
+    # Cached so games decoded from the same board share one BoardLayout
+    # (and its legality index and similarity cache)
+    if inline:
+        words, offset = [], 0
+        for _ in range(num_words):
+            length = section[offset]
+            words.append(section[offset + 1:offset + 1 + length].decode('utf-8'))
+            offset += 1 + length
+    else:
+        ids, checksum = _pool_ids()
+        stored, *positions = struct.unpack_from(f'<I{num_words}H', section)
+        if stored != checksum:
+            raise ValueError("Game state was encoded against a different noun pool")
+        from codenames_artifacts import load_noun_pool
+        pool = load_noun_pool()
+        if any(i >= len(pool) for i in positions):
+            raise ValueError("Game state has a word id outside the noun pool")
+        words = [pool[i] for i in positions]
+        offset = 4 + 2 * num_words
+    packed = section[offset:]
+    colors = [COLORS[packed[i >> 2] >> (2 * (i & 3)) & 3] for i in range(num_words)]
+    layout = BoardLayout(list(zip(words, colors)))
+    layout._encoded = (inline, section)
+    return layout
+
+def decode_game(data):
+    """Inverse of encode_game()"""
+    data = bytes(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated game state")
+    magic, version, flags, num_words, team, winner, current_n, guesses_made = \
+        _HEADER.unpack_from(data)
+    if magic != STATE_MAGIC:
+        raise ValueError("Not a Codenames game state")
+    if version != STATE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported game state version: {version}")
+    for code in (team, winner):
+        if code >= len(COLORS) and code != _NONE_CODE:
+            raise ValueError(f"Bad color code in game state: {code}")
+    
+    inline = bool(flags & FLAG_INLINE_WORDS)
+    offset = _HEADER.size
+    if inline:
+        end = offset
+        for _ in range(num_words):
+            if end >= len(data):
+                raise ValueError("Truncated game state")
+            end += 1 + data[end]
+    else:
+        end = offset + 4 + 2 * num_words
+    end += (num_words + 3) // 4
+    mask_end = end + (num_words + 7) // 8
+    if mask_end > len(data):
+        raise ValueError("Truncated game state")
+    layout = _decode_board(data[offset:end], num_words, inline)
+    
+    revealed_mask = int.from_bytes(data[end:mask_end], 'little')
+    if revealed_mask >> num_words:
+        raise ValueError("Game state reveals cards that are not on the board")
+    clue = None
+    clue_end = mask_end
+    if flags & FLAG_CLUE:
+        if mask_end + 2 > len(data):
+            raise ValueError("Truncated game state")
+        (length,) = struct.unpack_from('<H', data, mask_end)
+        clue_end = mask_end + 2 + length
+        if clue_end > len(data):
+            raise ValueError("Truncated game state")
+        clue = data[mask_end + 2:clue_end].decode('utf-8')
+    if clue_end != len(data):
+        raise ValueError(f"Game state has {len(data) - clue_end} trailing bytes")
+    
+    game = CodenamesGame(layout, None if team == _NONE_CODE else COLORS[team])
+    game._restore(
+        revealed_mask, bool(flags & FLAG_GAME_OVER),
+        None if winner == _NONE_CODE else COLORS[winner],
+        clue, current_n, guesses_made,
+    )
+    return game
 
 
 # ============================================
 # HELPER FUNCTIONS (Pure functions - no state)
 # ============================================
 
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """Porter stem, memoized (clue candidates repeat across boards and turns)"""
+    return get_stemmer().stem(word)
+
+class BoardLegalityIndex:
+    """
+    Precomputed board data that answers is_illegal_clue() for one board.
+
+    Board words and their stems live in sets. Every substring of every board
+    word is also in a set, which answers "clue inside a board word" with one
+    lookup. "Board word inside clue" is a plain `in` test per board word,
+    which beats sliding windows over the clue in Python.
+    """
+    
+    def __init__(self, board_words):
+        self.words = frozenset(w.lower() for w in board_words)
+        self.stems = frozenset(stem(w) for w in self.words)
+        self._word_list = tuple(self.words)
+        self._substrings = frozenset(
+            w[i:j] for w in self.words for i in range(len(w)) for j in range(i + 1, len(w) + 1)
+        )
+    
+    def is_illegal(self, clue):
+        if not self.words:
+            return False
+        clue_lower = clue.lower()
+        if not clue_lower or clue_lower in self._substrings:
+            return True
+        for word in self._word_list:
+            if word in clue_lower:
+                return True
+        return stem(clue_lower) in self.stems
+
+def legality_index(all_board_words):
+    """Accept either a prebuilt BoardLegalityIndex or a plain list of words"""
+    if isinstance(all_board_words, BoardLegalityIndex):
+        return all_board_words
+    return BoardLegalityIndex(all_board_words)
+
 def is_illegal_clue(clue, all_board_words):
+    if isinstance(all_board_words, BoardLegalityIndex):
+        return all_board_words.is_illegal(clue)
+    
     clue_lower = clue.lower()
-    clue_stem = stemmer.stem(clue_lower)
+    clue_stem = stem(clue_lower)
     
     for word in all_board_words:
         word_lower = word.lower()
-        word_stem = stemmer.stem(word_lower)
+        word_stem = stem(word_lower)
         
         if clue_lower in word_lower or word_lower in clue_lower:
             return True
@@ -153,15 +527,13 @@ def breakapart_compound_word(clue):
     return [p for p in parts if p]
 
 def wordnet_similarity(clue, word):
-    clue_synsets = wn.synsets(clue.lower())
-    word_synsets = wn.synsets(word.lower())
-    if not clue_synsets or not word_synsets:
-        return 0.0
-    return clue_synsets[0].wup_similarity(word_synsets[0]) or 0.0
+    """Wu-Palmer similarity of the words' first synsets (precomputed table, 0.0 if undefined)"""
+    from codenames_artifacts import load_wup_table
+    return float(load_wup_table().matrix([clue], [word])[0, 0])
 
 def word2vec_similarity(clue, word):
     try:
-        return glove_wiki_model.similarity(clue.lower(), word.lower())
+        return get_model().similarity(clue.lower(), word.lower())
     except KeyError:
         return 0.0
 
@@ -169,56 +541,786 @@ def calc_similarity(clue, word, threshold=0.3):
     return float(word2vec_similarity(clue, word))
 
 def generate_clues_for_word(word, all_board_words):
+    # Hypernym candidates come from the prebuilt index (see codenames_artifacts)
+    from codenames_artifacts import hypernym_candidates
+
+    legality = legality_index(all_board_words)
+    candidates = hypernym_candidates(word)
     clues = set()
-    synsets = wn.synsets(word.lower())
-    
-    if not synsets:
-        return clues
-    
-    for synset in synsets: 
-        for hyp in synset.hypernyms():
-            for lemma in hyp.lemmas():
-                clue = lemma.name()
-                if is_illegal_clue(clue, all_board_words):
-                    continue
-                for cleaned_clue in breakapart_compound_word(clue):
-                    if cleaned_clue.lower() not in STOPWORDS and len(cleaned_clue) >= 3:
-                        clues.add(cleaned_clue)
+    illegal = 0
+    for lemma, parts in candidates:
+        if legality.is_illegal(lemma):
+            illegal += 1
+            continue
+        clues.update(parts)
+    if instrumentation.enabled:
+        instrumentation.count('candidates_generated', len(candidates))
+        instrumentation.count('candidates_illegal', illegal)
     return clues
 
 def generate_all_clues(target_words, all_board_words):
+    legality = legality_index(all_board_words)
     all_clues = set()
     for target in target_words:
-        word_clues = generate_clues_for_word(target, all_board_words)
+        word_clues = generate_clues_for_word(target, legality)
         all_clues.update(word_clues)
     return all_clues
 
-def score_clues(clues, target_words, avoid_words, assassin_words, risk_aversion=2.0):
-    scored_clues = {}
-    for clue in clues:
-        total_score = 0.0
-        for target in target_words:
-            total_score += calc_similarity(clue, target, 0.3)
-        for avoid in avoid_words:
-            total_score -= calc_similarity(clue, avoid, 0.3)
-        for assassin in assassin_words:
-            total_score -= calc_similarity(clue, assassin, 0.3) * risk_aversion
-        scored_clues[clue] = total_score
-    return scored_clues
-
-def setup_game(num_words=25):
-    all_nouns = set()
-    for synset in list(wn.all_synsets('n'))[:5000]:
-        for lemma in synset.lemmas():
-            word = lemma.name()
-            if word.isalpha() and '_' not in word and len(word) > 3:
-                all_nouns.add(word.lower())
-    
-    board_words = random.sample(list(all_nouns), num_words)
-    colors = ['red'] * 9 + ['blue'] * 8 + ['neutral'] * 7 + ['assassin']
-    random.shuffle(colors)
-    
-    return list(zip(board_words, colors)), random.choice(['red', 'blue'])
-
-
-print(is_illegal_clue("kiss", ["kiss","kissed", "love", "heart"]))
\ No newline at end of file
+# Hybrid scoring: share of WordNet Wu-Palmer similarity blended into every
+# clue/word similarity (0 = embeddings only)
+_wordnet_weight = 0.0
+
+def set_wordnet_weight(weight):
+    """Blend weight * WuP + (1 - weight) * cosine from now on (0 <= weight <= 1)"""
+    global _wordnet_weight
+    if not 0.0 <= weight <= 1.0:
+        raise ValueError(f"wordnet weight must be in [0, 1], got {weight}")
+    _wordnet_weight = float(weight)
+
+def get_wordnet_weight():
+    return _wordnet_weight
+
+def similarity_matrix(clues, words):
+    """Similarity of every clue (rows) against every word (columns): cosine, or the hybrid blend"""
+    clues, words = list(clues), list(words)
+    instrumentation.count('similarity_evaluations', len(clues) * len(words))
+    sims = cosine_matrix(get_model(), clues, words)
+    weight = _wordnet_weight
+    if weight:
+        from codenames_artifacts import load_wup_table
+        sims = (1.0 - weight) * sims + weight * load_wup_table().matrix(clues, words)
+    return sims
+
+# ============================================
+# SCORING MODES
+# ============================================
+# Every mode maps one clue x [targets | avoid | assassins] similarity matrix
+# to one score per clue, vectorized, so any mode (or all of them) can be
+# applied to the same matrix without touching the model again.
+
+SCORING_MODES = {}  # name -> fn(sims, num_targets, num_avoid, risk_aversion, max_size)
+
+# 'threshold' mode: similarities at or below this count as no connection
+SIMILARITY_THRESHOLD = 0.3
+# 'softmax' mode: operative's guess temperature over cosine similarities
+SOFTMAX_TEMPERATURE = 0.1
+
+def scoring_mode(name):
+    """Decorator registering a scoring mode under name"""
+    def register(fn):
+        SCORING_MODES[name] = fn
+        return fn
+    return register
+
+def split_roles(sims, num_targets, num_avoid):
+    """(target, avoid, assassin) column blocks of a clue x board similarity matrix"""
+    return (sims[:, :num_targets], sims[:, num_targets:num_targets + num_avoid],
+            sims[:, num_targets + num_avoid:])
+
+def danger_line(avoid_sims, assassin_sims, risk_aversion=2.0):
+    """Per clue: the strongest avoid similarity or risk_aversion * assassin similarity"""
+    danger = np.full(len(avoid_sims), -1.0)
+    if avoid_sims.shape[1]:
+        danger = np.maximum(danger, avoid_sims.max(axis=1))
+    if assassin_sims.shape[1]:
+        danger = np.maximum(danger, risk_aversion * assassin_sims.max(axis=1))
+    return danger
+
+@scoring_mode('sum')
+def score_sum(sims, num_targets, num_avoid, risk_aversion=2.0, max_size=4):
+    """sum(target sims) - sum(avoid sims) - risk_aversion * sum(assassin sims)"""
+    targets, avoids, assassins = split_roles(sims, num_targets, num_avoid)
+    return targets.sum(axis=1) - avoids.sum(axis=1) - risk_aversion * assassins.sum(axis=1)
+
+@scoring_mode('threshold')
+def score_threshold(sims, num_targets, num_avoid, risk_aversion=2.0, max_size=4):
+    """Like 'sum', counting only similarities above SIMILARITY_THRESHOLD"""
+    return score_sum(
+        np.where(sims > SIMILARITY_THRESHOLD, sims, 0.0), num_targets, num_avoid, risk_aversion
+    )
+
+@scoring_mode('margin')
+def score_margin(sims, num_targets, num_avoid, risk_aversion=2.0, max_size=4):
+    """
+    n + margin / 2 for the largest n <= max_size whose n closest targets all
+    beat the danger line (margin = weakest of them - danger line, in [0, 2]).
+    A clue with no clean target scores its (negative) best margin / 2.
+    """
+    targets, avoids, assassins = split_roles(sims, num_targets, num_avoid)
+    if not num_targets:
+        return np.full(len(sims), -1.0)
+    danger = danger_line(avoids, assassins, risk_aversion)
+    ranked = -np.sort(-targets, axis=1)[:, :max(1, max_size)]
+    margins = ranked - danger[:, None]
+    clean = (margins >= 0).sum(axis=1)
+    weakest = np.take_along_axis(margins, np.maximum(clean - 1, 0)[:, None], axis=1)[:, 0]
+    return np.where(clean > 0, clean + weakest / 2, margins[:, 0] / 2)
+
+@scoring_mode('softmax')
+def score_softmax(sims, num_targets, num_avoid, risk_aversion=2.0, max_size=4):
+    """
+    P(first guess is a target) - risk_aversion * P(first guess is the
+    assassin), for an operative guessing by softmax(similarity / T) over the
+    unrevealed cards
+    """
+    logits = sims / SOFTMAX_TEMPERATURE
+    probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+    probs /= probs.sum(axis=1, keepdims=True)
+    targets, _, assassins = split_roles(probs, num_targets, num_avoid)
+    return targets.sum(axis=1) - risk_aversion * assassins.sum(axis=1)
+
+def check_scoring_mode(mode):
+    if mode != 'subsets' and mode not in SCORING_MODES:
+        raise ValueError(f"unknown scoring mode {mode!r}; choose from {scoring_mode_names()}")
+    return mode
+
+def scoring_mode_names():
+    """Names accepted by suggest_clues(scoring=...): 'subsets' plus every registered mode"""
+    return ('subsets',) + tuple(SCORING_MODES)
+
+def score_matrix(sims, num_targets, num_avoid, risk_aversion=2.0, mode='sum', max_size=4):
+    """One score per clue row of sims (columns [targets | avoid | assassins]), timed per mode"""
+    with instrumentation.stage(f'mode.{mode}'):
+        return SCORING_MODES[mode](
+            np.asarray(sims, dtype=np.float64), num_targets, num_avoid, risk_aversion, max_size
+        )
+
+def score_clues(clues, target_words, avoid_words, assassin_words, risk_aversion=2.0, mode='sum'):
+    """
+    {clue: score} under a scoring mode; the default 'sum' is
+    sum(target sims) - sum(avoid sims) - risk_aversion * sum(assassin sims)
+
+    All pairs come from one similarity matrix; the weighting is vectorized
+    instead of a Python loop per pair.
+    """
+    return score_clues_modes(clues, target_words, avoid_words, assassin_words, risk_aversion, (mode,))[mode]
+
+def score_clues_modes(clues, target_words, avoid_words, assassin_words, risk_aversion=2.0, modes=None):
+    """{mode: {clue: score}} for several modes (default: all) from one similarity matrix"""
+    modes = tuple(SCORING_MODES) if modes is None else tuple(modes)
+    for mode in modes:
+        if mode not in SCORING_MODES:
+            raise ValueError(f"unknown scoring mode {mode!r}; choose from {tuple(SCORING_MODES)}")
+    clues = list(clues)
+    if not clues:
+        return {mode: {} for mode in modes}
+    target_words, avoid_words = list(target_words), list(avoid_words)
+    sims = similarity_matrix(clues, target_words + avoid_words + list(assassin_words))
+    return {
+        mode: dict(zip(clues, score_matrix(
+            sims, len(target_words), len(avoid_words), risk_aversion, mode
+        ).tolist()))
+        for mode in modes
+    }
+
+def top_clues(clues, target_words, avoid_words, assassin_words, risk_aversion=2.0,
+              top_k=5, chunk_size=1024):
+    """
+    Yield the top_k (clue, score) pairs by score_clues() score, best first.
+
+    clues may be any iterable; it is consumed chunk by chunk into a bounded
+    heap, so score arrays stay at chunk_size and the heap at top_k. Repeats
+    are dropped across chunks, which keeps a set of every distinct clue
+    seen: that part grows with the number of distinct candidates. Ties keep
+    the clue seen first.
+
+    The embedding part of the score is linear, so targets and dangers each
+    collapse to one weighted vector and cost a dot product per clue. With
+    hybrid scoring the Wu-Palmer blocks are the expensive part; they are
+    filled in branch-and-bound: Wu-Palmer lies in [0, 1], so a clue whose
+    score so far plus the most the missing blocks could add can't beat the
+    current k-th best is dropped before its target block, and again before
+    its avoid / assassin block.
+    """
+    if top_k <= 0:
+        return
+    model = get_model()
+    weight = _wordnet_weight
+    target_words = list(target_words)
+    dangers = list(avoid_words) + list(assassin_words)
+    danger_weights = np.concatenate([
+        -np.ones(len(avoid_words)), np.full(len(assassin_words), -risk_aversion),
+    ])
+    vectors, _ = unit_vectors(model, target_words + dangers)
+    direction = np.concatenate([np.ones(len(target_words)), danger_weights]) @ vectors.astype(np.float64)
+    if weight:
+        from codenames_artifacts import load_wup_table
+        wup = load_wup_table()
+    # Most the Wu-Palmer blocks can still add: every target at 1, and only
+    # negatively weighted dangers (risk_aversion < 0) can add anything
+    target_slack = weight * len(target_words)
+    danger_slack = weight * float(np.clip(danger_weights, 0.0, None).sum())
+    
+    heap = []  # (score, -position, clue): the worst kept clue on top
+    seen = set()
+    position = 0
+    
+    def prune(candidates, scores, slack, counter):
+        if len(heap) < top_k or not len(candidates):
+            return candidates
+        kept = candidates[scores[candidates] + slack >= heap[0][0]]
+        instrumentation.count(counter, len(candidates) - len(kept))
+        return kept
+    
+    clues = iter(clues)
+    while True:
+        raw = list(itertools.islice(clues, chunk_size))
+        if not raw:
+            break
+        chunk = [c for c in dict.fromkeys(raw) if c not in seen]
+        if not chunk:
+            continue
+        seen.update(chunk)
+        clue_vectors, _ = unit_vectors(model, chunk)
+        scores = (1.0 - weight) * (clue_vectors.astype(np.float64) @ direction)
+        survivors = np.arange(len(chunk))
+        if weight:
+            survivors = prune(survivors, scores, target_slack + danger_slack, 'pruned_target_blocks')
+            if target_words and len(survivors):
+                block = wup.matrix([chunk[i] for i in survivors], target_words)
+                scores[survivors] += weight * block.sum(axis=1)
+            survivors = prune(survivors, scores, danger_slack, 'pruned_danger_blocks')
+            if dangers and len(survivors):
+                block = wup.matrix([chunk[i] for i in survivors], dangers)
+                scores[survivors] += weight * (block @ danger_weights)
+        
+        # Only the chunk's own top_k can enter the heap
+        survivors = prune(survivors, scores, 0.0, 'pruned_clues')
+        if len(survivors) > top_k:
+            best = np.argpartition(-scores[survivors], top_k - 1)[:top_k]
+            # Keep ties with the k-th best so the first-seen rule still holds
+            survivors = survivors[scores[survivors] >= scores[survivors[best]].min()]
+        for i in survivors.tolist():
+            item = (float(scores[i]), -(position + i), chunk[i])
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        position += len(chunk)
+    
+    for score, _, clue in sorted(heap, reverse=True):
+        yield clue, score
+
+class BoardSimilarityCache:
+    """
+    Clue x board-word similarities for one board, reused across turns.
+
+    Only `revealed` changes between turns, so each clue's row of
+    similarities against every board word is computed once (in batches) and
+    kept in a fixed-capacity matrix with LRU eviction. A later turn selects
+    the unrevealed columns of the cached rows; revealed words simply drop
+    out of the selection, and only clues never seen on this board are
+    scored against the model.
+    """
+    
+    def __init__(self, board_words, max_clues=4096):
+        self.words = list(board_words)
+        self.index = {w: i for i, w in enumerate(self.words)}
+        self.max_clues = max_clues
+        self.matrix = np.empty((max_clues, len(self.words)), dtype=np.float32)
+        self.slots = OrderedDict()  # clue -> matrix row, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._wordnet_weight = None
+        self._lock = threading.Lock()
+    
+    def _slots_for(self, clues):
+        """Matrix rows for clues, computing the missing ones in one batch"""
+        model = get_model()
+        if model is not self._model or _wordnet_weight != self._wordnet_weight:
+            self.slots.clear()
+            self._model = model
+            self._wordnet_weight = _wordnet_weight
+        
+        missing = []
+        for clue in clues:
+            if clue in self.slots:
+                self.slots.move_to_end(clue)
+            elif clue not in missing:
+                missing.append(clue)
+        self.hits += len(clues) - len(missing)
+        self.misses += len(missing)
+        
+        if missing:
+            rows = similarity_matrix(missing, self.words)
+            for clue, row in zip(missing, rows):
+                if len(self.slots) < self.max_clues:
+                    slot = len(self.slots)
+                else:
+                    _, slot = self.slots.popitem(last=False)
+                self.matrix[slot] = row
+                self.slots[clue] = slot
+        return np.fromiter((self.slots[c] for c in clues), dtype=np.int64, count=len(clues))
+    
+    def rows(self, clues, columns=None):
+        """Similarity of each clue (rows) against board words (all, or the given indices)"""
+        clues = list(clues)
+        if len(set(clues)) > self.max_clues:
+            return similarity_matrix(clues, [self.words[i] for i in columns] if columns is not None else self.words)
+        with self._lock:
+            slots = self._slots_for(clues)
+            if columns is None:
+                return self.matrix[slots]
+            return self.matrix[np.ix_(slots, columns)]
+    
+    def word_indices(self, words):
+        return [self.index[w] for w in words]
+
+def rank_target_subsets(clues, sims, target_words, num_avoid, risk_aversion=2.0,
+                        max_size=4, min_margin=0.0, top_k=10):
+    """
+    Rank clues by how many targets they connect, from one similarity matrix.
+
+    sims has one row per clue and columns [targets | avoid | assassins]. For a
+    fixed clue and size n, the best subset is always the n targets most
+    similar to the clue, so one sort per row covers every subset. The margin
+    of (clue, n) is the weakest intended target's similarity minus the
+    strongest danger: any avoid word, or risk_aversion * the assassin.
+    
+    Returns [(clue, n, intended_targets, margin)] with margin >= min_margin,
+    best first: more targets, then larger margin. Each clue appears once, at
+    its largest n.
+    """
+    num_targets = len(target_words)
+    max_size = min(max_size, num_targets)
+    if not len(clues) or max_size < 1:
+        return []
+    
+    target_sims, avoid_sims, assassin_sims = split_roles(sims, num_targets, num_avoid)
+    danger = danger_line(avoid_sims, assassin_sims, risk_aversion)
+    
+    # Upper bound: a clue whose closest target can't clear the danger line
+    # can't qualify at any size
+    candidates = np.flatnonzero(target_sims.max(axis=1) - danger >= min_margin)
+    if not len(candidates):
+        return []
+    order = np.argsort(-target_sims[candidates], axis=1, kind='stable')[:, :max_size]
+    ranked_sims = np.take_along_axis(target_sims[candidates], order, axis=1)
+    margins = ranked_sims - danger[candidates, None]
+    
+    results = []
+    seen = set()
+    for n in range(max_size, 0, -1):
+        qualified = np.flatnonzero(margins[:, n - 1] >= min_margin)
+        qualified = qualified[np.argsort(-margins[qualified, n - 1], kind='stable')]
+        for row in qualified:
+            clue = clues[candidates[row]]
+            if clue in seen:
+                continue
+            seen.add(clue)
+            intended = tuple(target_words[j] for j in order[row, :n])
+            results.append((clue, n, intended, float(margins[row, n - 1])))
+        # Smaller groupings always rank below the ones already found
+        if len(results) >= top_k:
+            break
+    return results[:top_k]
+
+def search_clue_subsets(clues, target_words, avoid_words, assassin_words, risk_aversion=2.0,
+                        max_size=4, min_margin=0.0, top_k=10):
+    """rank_target_subsets() over a freshly computed clue x board similarity matrix"""
+    # Out-of-vocabulary clues would tie everything at similarity 0
+    clues = known_words(get_model(), clues)
+    target_words, avoid_words = list(target_words), list(avoid_words)
+    sims = similarity_matrix(clues, target_words + avoid_words + list(assassin_words))
+    return rank_target_subsets(
+        clues, sims, target_words, len(avoid_words), risk_aversion, max_size, min_margin, top_k
+    )
+
+def suggestion_roles(game):
+    """(targets, avoid, assassins) for the current team's spymaster"""
+    team = game.current_team
+    opponent = 'blue' if team == 'red' else 'red'
+    targets = game.get_unrevealed_by_color(team)
+    avoids = game.get_unrevealed_by_color(opponent) + game.get_unrevealed_by_color('neutral')
+    return targets, avoids, game.get_unrevealed_by_color('assassin')
+
+def candidate_clues(game, targets, use_ann=False):
+    """Sorted, legal clue candidates for the targets"""
+    with instrumentation.stage('generate'):
+        layout = game.layout
+        clues = set().union(*(layout.clues_for(t) for t in targets))
+    if use_ann:
+        from codenames_ann import ann_candidates
+        with instrumentation.stage('ann'):
+            clues |= ann_candidates(targets, game.legality)
+    return sorted(clues)
+
+def rank_by_mode(clues, sims, target_words, num_avoid, risk_aversion=2.0, max_size=4,
+                 min_margin=0.0, top_k=5, mode='sum'):
+    """
+    The top_k clues by a scoring mode: [(clue, n, intended_targets, score)].
+
+    intended_targets are the clue's closest targets (up to max_size) that
+    beat the danger line by min_margin, or just the closest one if none do.
+    """
+    num_targets = len(target_words)
+    if not len(clues) or not num_targets:
+        return []
+    scores = score_matrix(sims, num_targets, num_avoid, risk_aversion, mode, max_size)
+    top = np.argsort(-scores, kind='stable')[:top_k]
+    target_sims, avoid_sims, assassin_sims = split_roles(sims[top], num_targets, num_avoid)
+    danger = danger_line(avoid_sims, assassin_sims, risk_aversion)
+    order = np.argsort(-target_sims, axis=1, kind='stable')[:, :max(1, max_size)]
+    ranked_sims = np.take_along_axis(target_sims, order, axis=1)
+    counts = np.maximum((ranked_sims - danger[:, None] >= min_margin).sum(axis=1), 1)
+    return [
+        (clues[row], int(n), tuple(target_words[j] for j in order[i, :n]), float(scores[row]))
+        for i, (row, n) in enumerate(zip(top, counts))
+    ]
+
+def rank_suggestions(clues, sims, targets, num_avoid, risk_aversion=2.0, max_size=4,
+                     min_margin=0.0, top_k=5, scoring='subsets'):
+    """
+    rank_target_subsets(), falling back to the best single-target clues; or
+    rank_by_mode() for any other scoring mode
+    """
+    if scoring != 'subsets':
+        with instrumentation.stage('rank'):
+            return rank_by_mode(
+                clues, sims, targets, num_avoid, risk_aversion, max_size, min_margin, top_k, scoring
+            )
+    with instrumentation.stage('rank'):
+        ranked = rank_target_subsets(
+            clues, sims, targets, num_avoid, risk_aversion, max_size, min_margin, top_k
+        )
+        if not ranked:
+            ranked = rank_target_subsets(
+                clues, sims, targets, num_avoid, risk_aversion, 1, -np.inf, top_k
+            )
+    return ranked
+
+_precompute_lock = threading.Lock()
+
+def _precompute_board(layout, use_ann):
+    model = get_model()
+    teams = [
+        [layout.words[i] for i in layout.by_color[code]] for code in (RED, BLUE)
+    ]
+    with instrumentation.stage('precompute'):
+        clues = set()
+        for words in teams:
+            for word in words:
+                clues |= layout.clues_for(word)
+            if use_ann:
+                from codenames_ann import ann_candidates
+                clues |= ann_candidates(words, layout.legality)
+        clues = known_words(model, sorted(clues))
+        cache = layout.similarity_cache
+        # Rows cover every board word, so any team / turn only masks columns
+        cache.rows(clues[:cache.max_clues])
+
+def precompute_suggestions(game, use_ann=False, wait=False):
+    """
+    Speculatively build the board's clue table in a background thread: the
+    hypernym candidates of every red and blue word, and their similarity
+    rows against the whole board (in game.similarity_cache). Later
+    suggest_clues() calls for either team at any turn then only select
+    the unrevealed columns and rank. Runs once per board; returns the thread.
+    """
+    layout = game.layout
+    with _precompute_lock:
+        thread = layout._precompute
+        if thread is None:
+            thread = layout._precompute = threading.Thread(
+                target=_precompute_board, args=(layout, use_ann), name='precompute', daemon=True
+            )
+            thread.start()
+    if wait:
+        thread.join()
+    return thread
+
+# Optional persistent result cache (codenames_cache.SuggestionCache);
+# resolved from $CODENAMES_SUGGESTION_CACHE on first use
+_suggestion_cache = None
+_suggestion_cache_resolved = False
+
+def set_suggestion_cache(cache):
+    """Use cache for suggest_clues() / suggest_batch() results from now on (None disables it)"""
+    global _suggestion_cache, _suggestion_cache_resolved
+    _suggestion_cache = cache
+    _suggestion_cache_resolved = True
+
+def get_suggestion_cache():
+    global _suggestion_cache, _suggestion_cache_resolved
+    if not _suggestion_cache_resolved:
+        from codenames_cache import default_suggestion_cache
+        _suggestion_cache = default_suggestion_cache()
+        _suggestion_cache_resolved = True
+    return _suggestion_cache
+
+def suggest_clues(game, max_size=4, top_k=5, risk_aversion=2.0, min_margin=0.0, use_ann=False,
+                  scoring='subsets'):
+    """
+    Clue suggestions for the current team: [(clue, n, intended_targets, margin)].
+
+    Candidates come from every unrevealed team word; every grouping of up to
+    max_size of them is considered. If no clue clears min_margin for even one
+    target, the single-target clues with the best margin are returned instead.
+    With use_ann, nearest neighbours from the whole vocabulary (codenames_ann)
+    are added to the WordNet hypernym candidates. Any other scoring mode
+    (scoring_mode_names()) ranks by that mode instead; the last field is
+    then the mode's score. Results are looked up in and stored to the
+    suggestion cache when one is set.
+    """
+    options = (max_size, top_k, risk_aversion, min_margin, use_ann, check_scoring_mode(scoring))
+    cache = get_suggestion_cache()
+    if cache is None:
+        return _suggest_clues(game, *options)
+    with instrumentation.stage('cache'):
+        key = cache.key(game, options)
+        result = cache.get(key)
+    if result is None:
+        result = _suggest_clues(game, *options)
+        cache.put(key, result)
+    return result
+
+def _suggest_clues(game, max_size, top_k, risk_aversion, min_margin, use_ann, scoring):
+    targets, avoids, assassins = suggestion_roles(game)
+    if not targets:
+        return []
+    clues = candidate_clues(game, targets, use_ann)
+    with instrumentation.stage('score'):
+        # Out-of-vocabulary clues would tie everything at similarity 0
+        clues = known_words(get_model(), clues)
+        if not clues:
+            return []
+        cache = game.similarity_cache
+        sims = cache.rows(clues, cache.word_indices(targets + avoids + assassins))
+    return rank_suggestions(
+        clues, sims, targets, len(avoids), risk_aversion, max_size, min_margin, top_k, scoring
+    )
+
+def suggest_batch(games, max_size=4, top_k=5, risk_aversion=2.0, min_margin=0.0,
+                  use_ann=False, max_cells=1 << 24, scoring='subsets'):
+    """
+    suggest_clues() for many games at once; returns one suggestion list per game.
+
+    Candidate clues and board words are deduplicated across games, looked up
+    in the model once, and scored with one matrix product per group of games
+    (groups are cut so the matrix stays under max_cells entries). Each game
+    then ranks its own slice with its own target / avoid / assassin split.
+    """
+    games = list(games)
+    model = get_model()
+    options = (max_size, top_k, risk_aversion, min_margin, use_ann, check_scoring_mode(scoring))
+    results = [None] * len(games)
+    cache = get_suggestion_cache()
+    keys = {}
+    if cache is not None:
+        with instrumentation.stage('cache'):
+            for i, game in enumerate(games):
+                key = cache.key(game, options)
+                results[i] = cache.get(key)
+                if results[i] is None:
+                    keys[i] = key
+    
+    plans = []
+    for game, result in zip(games, results):
+        if result is not None:
+            plans.append(([], [], [], []))
+            continue
+        targets, avoids, assassins = suggestion_roles(game)
+        clues = known_words(model, candidate_clues(game, targets, use_ann)) if targets else []
+        plans.append((clues, targets, avoids, assassins))
+    
+    for i, (clues, _, _, _) in enumerate(plans):
+        if results[i] is None and not clues:
+            results[i] = []
+    group, group_clues, group_words = [], {}, {}
+    
+    def flush():
+        if not group:
+            return
+        with instrumentation.stage('score'):
+            sims = similarity_matrix(list(group_clues), list(group_words))
+        for i in group:
+            clues, targets, avoids, assassins = plans[i]
+            rows = [group_clues[c] for c in clues]
+            columns = [group_words[w] for w in targets + avoids + assassins]
+            results[i] = rank_suggestions(
+                clues, sims[np.ix_(rows, columns)], targets, len(avoids),
+                risk_aversion, max_size, min_margin, top_k, scoring,
+            )
+        group.clear()
+        group_clues.clear()
+        group_words.clear()
+    
+    for i, (clues, targets, avoids, assassins) in enumerate(plans):
+        if not clues:
+            continue
+        words = targets + avoids + assassins
+        new_clues = len(set(clues).difference(group_clues))
+        new_words = len(set(words).difference(group_words))
+        if group and (len(group_clues) + new_clues) * (len(group_words) + new_words) > max_cells:
+            flush()
+        for clue in clues:
+            group_clues.setdefault(clue, len(group_clues))
+        for word in words:
+            group_words.setdefault(word, len(group_words))
+        group.append(i)
+    flush()
+    for i, key in keys.items():
+        cache.put(key, results[i])
+    return results
+
+# ============================================
+# AI OPERATIVE (guesser)
+# ============================================
+
+# Guesses whose confidence falls below this are not taken (the turn is
+# passed instead); the first guess of a turn is always taken
+MIN_GUESS_CONFIDENCE = 0.2
+
+def guess_plan(words, sims, guesses_left, min_confidence=MIN_GUESS_CONFIDENCE,
+               temperature=SOFTMAX_TEMPERATURE):
+    """
+    Guesses for one clue from its similarities to the unrevealed words:
+    [(word, similarity, confidence)], best first.
+
+    Confidence is the softmax(similarity / temperature) share of a word among
+    the words still unrevealed when it is guessed (i.e. assuming the earlier
+    guesses were right). The plan stops at guesses_left, or before the first
+    guess after the opening one whose confidence is below min_confidence.
+    """
+    if not len(words) or guesses_left < 1:
+        return []
+    sims = np.asarray(sims, dtype=np.float64)
+    order = np.argsort(-sims, kind='stable')[:guesses_left]
+    weights = np.exp((sims - sims.max()) / temperature)
+    # Mass left after removing each earlier guess from the pool
+    remaining = weights.sum() - np.concatenate([[0.0], np.cumsum(weights[order])[:-1]])
+    confidences = weights[order] / remaining
+    plan = []
+    for i, confidence in zip(order.tolist(), confidences.tolist()):
+        if plan and confidence < min_confidence:
+            break
+        plan.append((words[i], float(sims[i]), confidence))
+    return plan
+
+def guess_candidates(game):
+    """Unrevealed board words, in board order"""
+    words = game.layout.words
+    mask = game.revealed_mask
+    return [words[i] for i in range(len(words)) if not mask >> i & 1]
+
+def plan_guesses(game, min_confidence=MIN_GUESS_CONFIDENCE, temperature=SOFTMAX_TEMPERATURE):
+    """
+    The AI operative's guesses for the game's current clue:
+    [(word, similarity, confidence)] in the order to make them (see guess_plan).
+    Needs current_clue / current_n set; counts guesses already made.
+    """
+    if game.game_over or not game.current_clue:
+        return []
+    words = guess_candidates(game)
+    if not words:
+        return []
+    with instrumentation.stage('guess_rank'):
+        sims = similarity_matrix([game.current_clue], words)[0]
+    return guess_plan(words, sims, game.current_n - game.guesses_made, min_confidence, temperature)
+
+def plan_guesses_batch(games, min_confidence=MIN_GUESS_CONFIDENCE, temperature=SOFTMAX_TEMPERATURE):
+    """
+    plan_guesses() for many games at once. Clues and board words are looked
+    up once each; every game then needs only its own clue x unrevealed-words
+    dot products (gathered in one vectorized pass), not a full clue x word
+    matrix.
+    """
+    games = list(games)
+    active = [
+        (i, game.current_clue, guess_candidates(game)) for i, game in enumerate(games)
+        if not game.game_over and game.current_clue
+    ]
+    plans = [[] for _ in games]
+    if not active:
+        return plans
+    clues, words = {}, {}
+    clue_ids, word_ids, bounds = [], [], [0]
+    for _, clue, candidates in active:
+        clue_id = clues.setdefault(clue, len(clues))
+        for word in candidates:
+            clue_ids.append(clue_id)
+            word_ids.append(words.setdefault(word, len(words)))
+        bounds.append(len(word_ids))
+    
+    with instrumentation.stage('guess_rank'):
+        model = get_model()
+        instrumentation.count('similarity_evaluations', len(word_ids))
+        clue_vectors, _ = unit_vectors(model, list(clues))
+        word_vectors, _ = unit_vectors(model, list(words))
+        sims = np.einsum('ij,ij->i', clue_vectors[clue_ids], word_vectors[word_ids])
+        weight = _wordnet_weight
+        if weight:
+            from codenames_artifacts import load_wup_table
+            table = load_wup_table()
+            wup = np.concatenate([
+                table.matrix([clue], candidates)[0] for _, clue, candidates in active
+            ])
+            sims = (1.0 - weight) * sims + weight * wup
+    
+    for (i, _, candidates), start, end in zip(active, bounds, bounds[1:]):
+        game = games[i]
+        plans[i] = guess_plan(
+            candidates, sims[start:end], game.current_n - game.guesses_made, min_confidence, temperature
+        )
+    return plans
+
+def play_guesses(game, plan):
+    """
+    Make the planned guesses until one ends the turn (house rules as in the
+    GUI: a wrong color passes the turn, all correct keeps it) and pass the
+    turn if the plan runs out early. Returns [(word, color)] guessed.
+    """
+    guessed = []
+    for word, _, _ in plan:
+        success, color, _ = game.make_guess(word)
+        if not success:
+            continue
+        guessed.append((word, color))
+        if game.game_over:
+            return guessed
+        if game.should_end_turn(color):
+            if color != game.current_team:
+                game.end_turn()
+            else:
+                # All correct: same team, new clue
+                game.current_clue = None
+                game.current_n = 0
+                game.guesses_made = 0
+            return guessed
+    # Stopped short of n (low confidence): pass
+    game.end_turn()
+    return guessed
+
+@functools.lru_cache(maxsize=None)
+def board_colors(num_words=25):
+    """
+    Card colors for a board of num_words: red 9/25 of the cards (rounded),
+    blue one fewer, one assassin and the rest neutral. 25 -> 9/8/7/1.
+    """
+    red = round(num_words * 9 / 25)
+    blue = red - 1
+    neutral = num_words - red - blue - 1
+    if blue < 1 or neutral < 0:
+        raise ValueError(f"Board too small: {num_words} words")
+    return ('red',) * red + ('blue',) * blue + ('neutral',) * neutral + ('assassin',)
+
+def setup_game(num_words=25, seed=None, word_pool=None):
+    """
+    Deal a random board. Returns (list of (word, color), starting team).
+
+    Words come from the prebuilt noun pool unless word_pool is given. Pass a
+    seed for a reproducible board; without one the global random state is used.
+    """
+    if word_pool is None:
+        from codenames_artifacts import load_noun_pool
+        word_pool = load_noun_pool()
+    elif not isinstance(word_pool, (list, tuple)):
+        word_pool = tuple(sorted(word_pool))
+    
+    rng = random if seed is None else random.Random(seed)
+    board_words = rng.sample(word_pool, num_words)
+    colors = list(board_colors(num_words))
+    rng.shuffle(colors)
+    
+    return list(zip(board_words, colors)), rng.choice(['red', 'blue'])
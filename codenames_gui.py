@@ -1,25 +1,118 @@
+import argparse
+import logging
+import math
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox, scrolledtext
+from tkinter import messagebox, scrolledtext, ttk
 from codenames_game import (
     CodenamesGame, 
-    generate_all_clues, 
-    score_clues,
+    check_scoring_mode,
+    plan_guesses,
+    precompute_suggestions,
+    scoring_mode_names,
+    setup_game,
+    suggest_clues,
     is_illegal_clue
 )
+from codenames_embeddings import warm_up
+from codenames_profiling import instrumentation
+
+logger = logging.getLogger('codenames.gui')
+
+# Pause between the AI operative's guesses so they can be followed on screen
+AUTO_GUESS_DELAY_MS = 700
+
+# ============================================
+# CARD STYLES (built once)
+# ============================================
+
+REVEALED_COLORS = {   # Revealed: actual color (BRIGHT)
+    'red': '#FF0000',
+    'blue': '#0000FF',
+    'neutral': '#FFFF00',
+    'assassin': '#000000'
+}
+SPYMASTER_COLORS = {  # Spymaster view: DARKER colors
+    'red': '#FF6B6B',
+    'blue': '#4ECDC4',
+    'neutral': '#F7DC6F',
+    'assassin': '#95A5A6'
+}
+OPERATIVE_COLOR = '#FFFFFF'  # Operative view: all white
+
+def card_style(bg, fg, state, relief):
+    """Button options for one card look (active/highlight colors are Mac fixes)"""
+    return {
+        'bg': bg,
+        'fg': fg,
+        'activebackground': bg,
+        'highlightbackground': bg,
+        'highlightcolor': bg,
+        'state': state,
+        'relief': relief,
+    }
+
+# (view, color) -> Button options; view is 'revealed', 'spymaster' or 'operative'
+CARD_STYLES = {}
+for _color in REVEALED_COLORS:
+    CARD_STYLES['revealed', _color] = card_style(
+        REVEALED_COLORS[_color], 'black' if _color == 'neutral' else 'white', tk.DISABLED, tk.SUNKEN
+    )
+    CARD_STYLES['spymaster', _color] = card_style(SPYMASTER_COLORS[_color], 'black', tk.NORMAL, tk.RAISED)
+    CARD_STYLES['operative', _color] = card_style(OPERATIVE_COLOR, 'black', tk.NORMAL, tk.RAISED)
+
+def board_geometry(num_words):
+    """(columns, rows, button width in characters, card font) for a board size"""
+    columns = max(5, math.ceil(math.sqrt(num_words)))
+    rows = math.ceil(num_words / columns)
+    # Keep the board about as wide as the standard 5 x 15-character grid
+    width = max(6, 75 // columns)
+    font = ('Arial', max(8, 60 // columns), 'bold')
+    return columns, rows, width, font
 
 class CodenamesGUI:
-    def __init__(self, root):
+    def __init__(self, root, num_words=25, seed=None, scoring='subsets'):
         self.root = root
         self.root.title("Codenames")
-        self.root.geometry("1000x800")
         
         # Create game
-        self.game = CodenamesGame()
+        self.game = CodenamesGame(*setup_game(num_words=num_words, seed=seed))
         self.spymaster_mode = True  # Start in spymaster mode
+        self.scoring = check_scoring_mode(scoring)  # how AI suggestions are ranked
+        self.auto_plan = []  # AI operative's remaining guesses for this clue
+        self.auto_turn = 0   # bumped on every operative turn; stale steps stop
+        self.auto_pending = None   # turn whose plan is being computed
+        
+        # What the board currently shows, so update_display only touches
+        # cards whose look changed
+        self.card_views = [None] * len(self.game.board)  # per card: key into CARD_STYLES
+        self.rendered_mask = 0      # revealed_mask at the last render
+        self.rendered_mode = None   # spymaster_mode at the last render
+        self.rendered_labels = None
+        
+        # AI suggestions and operative plans run on one background thread;
+        # results come back through a queue polled with root.after so Tk is
+        # only touched here
+        self.suggest_jobs = queue.Queue()
+        self.suggest_results = queue.Queue()
+        self.suggest_job = 0           # bumped on every turn change
+        self.suggest_pending = None    # state key of the job in flight
+        self.suggest_cache = {}        # state key -> suggestions
+        self.show_when_ready = False
+        self.polling = False
+        threading.Thread(target=self.suggestion_worker, name='suggestions', daemon=True).start()
         
         # Create UI
         self.create_widgets()
         self.update_display()
+        
+        # Load the embedding model while the window draws, build the whole
+        # board's clue table for both teams, then start on the first
+        # spymaster's suggestions (answered from that table)
+        warm_up()
+        precompute_suggestions(self.game)
+        self.request_suggestions()
     
     def create_widgets(self):
         # Top control panel
@@ -54,21 +147,23 @@ class CodenamesGUI:
         )
         self.score_label.pack(side=tk.LEFT, padx=20)
         
-        # Board frame (5x5 grid)
+        # Board frame (5x5 grid for the standard board)
+        columns, rows, width, font = board_geometry(len(self.game.board))
+        self.root.geometry(f"1000x{800 + 70 * max(0, rows - 5)}")
         board_frame = tk.Frame(self.root)
         board_frame.pack(pady=20)
         
         self.word_buttons = []
-        for i in range(25):
-            row = i // 5
-            col = i % 5
+        for i, (word, _) in enumerate(self.game.board):
+            row = i // columns
+            col = i % columns
             
             btn = tk.Button(
                 board_frame,
-                text="",
-                width=15,
+                text=word.upper(),
+                width=width,
                 height=3,
-                font=('Arial', 12, 'bold'),
+                font=font,
                 command=lambda idx=i: self.on_word_click(idx)
             )
             btn.grid(row=row, column=col, padx=5, pady=5)
@@ -100,6 +195,8 @@ class CodenamesGUI:
         )
         self.suggest_btn.pack(side=tk.LEFT, padx=5)
         
+        self.suggest_progress = ttk.Progressbar(input_frame, mode='indeterminate', length=80)
+        
         self.input_label1 = tk.Label(input_frame, text="Clue:", font=('Arial', 12))
         self.input_label1.pack(side=tk.LEFT, padx=5)
         
@@ -131,6 +228,16 @@ class CodenamesGUI:
         self.pass_btn.pack(side=tk.LEFT, padx=5)
         self.pass_btn.config(state=tk.DISABLED)
         
+        self.auto_guess = tk.BooleanVar(value=False)
+        self.auto_guess_check = tk.Checkbutton(
+            input_frame,
+            text="🤖 Auto-guess",
+            variable=self.auto_guess,
+            command=self.on_auto_guess_toggle,
+            font=('Arial', 12)
+        )
+        self.auto_guess_check.pack(side=tk.LEFT, padx=5)
+        
         # Log area
         log_frame = tk.Frame(self.root)
         log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -157,6 +264,10 @@ class CodenamesGUI:
         
         self.update_display()
         self.log(f"🎯 {self.game.current_team.upper()} SPYMASTER's turn")
+        
+        # Speculatively compute suggestions so the popup opens instantly
+        self.cancel_suggestions()
+        self.request_suggestions()
     
     def switch_to_operative_mode(self):
         """Switch to operative mode - guessing words"""
@@ -170,74 +281,88 @@ class CodenamesGUI:
         self.submit_btn.config(state=tk.DISABLED)
         self.pass_btn.config(state=tk.NORMAL)
         
+        self.cancel_suggestions()
         self.update_display()
         self.log(f"👥 {self.game.current_team.upper()} OPERATIVES' turn - Click words to guess")
+        
+        self.auto_turn += 1
+        self.auto_plan = []
+        if self.auto_guess.get():
+            self.start_auto_guess()
+    
+    def on_auto_guess_toggle(self):
+        if self.auto_guess.get() and not self.spymaster_mode and not self.game.game_over:
+            self.start_auto_guess()
+    
+    def start_auto_guess(self):
+        """Let the AI operative play the rest of this clue (planned off the Tk thread)"""
+        self.auto_turn += 1  # any step chain still scheduled stops
+        self.auto_plan = []
+        self.auto_pending = self.auto_turn
+        self.suggest_jobs.put(('guess', self.auto_turn, None, self.game.copy()))
+        self.start_polling()
+    
+    def auto_guess_step(self, turn):
+        """Make the next planned guess, or pass once confidence runs out"""
+        if turn != self.auto_turn or self.spymaster_mode or self.game.game_over:
+            return  # The turn ended (or a human took over) since this was scheduled
+        if not self.auto_guess.get():
+            return
+        # Words clicked by hand in the meantime are skipped
+        while self.auto_plan and self.game.is_revealed(self.auto_plan[0][0]):
+            self.auto_plan.pop(0)
+        if not self.auto_plan:
+            self.log(f"🤖 Operative AI not confident about another guess - passing")
+            self.pass_turn()
+            return
+        word, _, confidence = self.auto_plan.pop(0)
+        self.log(f"🤖 Operative AI picks '{word}' (confidence {confidence:.0%})")
+        self.on_word_click(self.game.layout.index[word.lower()])
+        if turn == self.auto_turn and not self.spymaster_mode and not self.game.game_over:
+            self.root.after(AUTO_GUESS_DELAY_MS, self.auto_guess_step, turn)
     
     def update_display(self):
         """Update board colors and game state display"""
-        # Update board buttons
-        for i, (word, color) in enumerate(self.game.board):
-            btn = self.word_buttons[i]
-            btn.config(text=word.upper())
-            
-            if word in self.game.revealed:
-                # Word has been revealed - show actual color (BRIGHT)
-                color_map = {
-                    'red': '#FF0000',
-                    'blue': '#0000FF',
-                    'neutral': '#FFFF00',
-                    'assassin': '#000000'
-                }
-                text_color = 'white' if color in ['red', 'blue', 'assassin'] else 'black'
-                btn.config(
-                    bg=color_map[color],
-                    fg=text_color,
-                    activebackground=color_map[color],  # Mac fix
-                    highlightbackground=color_map[color],  # Mac fix
-                    state=tk.DISABLED,
-                    relief=tk.SUNKEN
-                )
-            elif self.spymaster_mode:
-                # Spymaster view - DARKER colors with Mac fixes
-                color_map = {
-                    'red': '#FF6B6B',
-                    'blue': '#4ECDC4',
-                    'neutral': '#F7DC6F',
-                    'assassin': '#95A5A6'
-                }
-                btn.config(
-                    bg=color_map[color],
-                    fg='black',
-                    activebackground=color_map[color],  # Mac fix
-                    highlightbackground=color_map[color],  # Mac fix
-                    highlightcolor=color_map[color],  # Mac fix
-                    state=tk.NORMAL,
-                    relief=tk.RAISED
-                )
-                print(f"Set {word} to {color} = {color_map[color]}")  # Debug
-            else:
-                # Operative view - all white
-                btn.config(
-                    bg='#FFFFFF',
-                    fg='black',
-                    activebackground='#FFFFFF',  # Mac fix
-                    highlightbackground='#FFFFFF',  # Mac fix
-                    state=tk.NORMAL,
-                    relief=tk.RAISED
-                )
-        
-        # Update score
+        # Only cards revealed since the last render change, unless the mode
+        # flipped (then every unrevealed card changes look)
+        mode = 'spymaster' if self.spymaster_mode else 'operative'
+        if mode != self.rendered_mode:
+            changed = range(len(self.word_buttons))
+        else:
+            diff = self.game.revealed_mask ^ self.rendered_mask
+            changed = [i for i in range(diff.bit_length()) if diff >> i & 1]
+        repainted = 0
+        for i in changed:
+            repainted += self.render_card(i, mode)
+        self.rendered_mode = mode
+        self.rendered_mask = self.game.revealed_mask
+        instrumentation.count('cards_repainted', repainted)
+        
+        # Update score and team labels
         counts = self.game.get_counts()
-        self.score_label.config(
-            text=f"Red: {counts['red']} | Blue: {counts['blue']} | Neutral: {counts['neutral']}"
-        )
-        
-        # Update team label
-        color = 'red' if self.game.current_team == 'red' else 'blue'
-        self.team_label.config(
-            text=f"🎯 {self.game.current_team.upper()} TEAM",
-            fg=color
-        )
+        labels = (counts['red'], counts['blue'], counts['neutral'], self.game.current_team)
+        if labels != self.rendered_labels:
+            self.rendered_labels = labels
+            self.score_label.config(
+                text=f"Red: {counts['red']} | Blue: {counts['blue']} | Neutral: {counts['neutral']}"
+            )
+            color = 'red' if self.game.current_team == 'red' else 'blue'
+            self.team_label.config(
+                text=f"🎯 {self.game.current_team.upper()} TEAM",
+                fg=color
+            )
+    
+    def render_card(self, i, mode):
+        """Restyle card i if its look changed; returns 1 if repainted"""
+        word, color = self.game.board[i]
+        view = 'revealed' if self.game.revealed_mask >> i & 1 else mode
+        key = (view, color)
+        if self.card_views[i] == key:
+            return 0
+        self.card_views[i] = key
+        self.word_buttons[i].config(**CARD_STYLES[key])
+        logger.debug("Set %s to %s (%s)", word, color, view)
+        return 1
     
     def on_word_click(self, idx):
         """Handle clicking a word on the board"""
@@ -251,7 +376,7 @@ class CodenamesGUI:
         
         word, _ = self.game.board[idx]
         
-        if word in self.game.revealed:
+        if self.game.is_revealed(word):
             self.log(f"⚠️ '{word}' already revealed!")
             return
         
@@ -328,10 +453,7 @@ class CodenamesGUI:
             return
         
         # ✅ NEW: Check if clue is illegal
-        from codenames_game import is_illegal_clue
-        all_board_words = self.game.get_all_words()
-        
-        if is_illegal_clue(clue, all_board_words):
+        if is_illegal_clue(clue, self.game.legality):
             messagebox.showwarning(
                 "Illegal Clue", 
                 f"'{clue}' is illegal!\n\nIt contains or matches a word on the board.\nChoose a different clue."
@@ -366,6 +488,7 @@ class CodenamesGUI:
     
     def disable_controls(self):
         """Disable all controls at game end"""
+        self.cancel_suggestions()
         self.submit_btn.config(state=tk.DISABLED)
         self.suggest_btn.config(state=tk.DISABLED)
         self.pass_btn.config(state=tk.DISABLED)
@@ -373,65 +496,146 @@ class CodenamesGUI:
         self.n_entry.config(state=tk.DISABLED)
         for btn in self.word_buttons:
             btn.config(state=tk.DISABLED)
+        self.card_views = [None] * len(self.word_buttons)  # no longer what CARD_STYLES says
     
     def show_suggestions(self):
         """Show AI-generated clue suggestions"""
-        targets = self.game.get_unrevealed_by_color(self.game.current_team)
-        opponent = 'blue' if self.game.current_team == 'red' else 'red'
-        avoids = self.game.get_unrevealed_by_color(opponent)
-        neutrals = self.game.get_unrevealed_by_color('neutral')
-        assassins = self.game.get_unrevealed_by_color('assassin')
-        all_board_words = self.game.get_all_words()
-        
-        if not targets:
+        if not self.game.get_unrevealed_by_color(self.game.current_team):
             messagebox.showinfo("No Targets", "No more words to guess!")
             return
         
-        # How many words to connect?
-        num_targets = min(3, len(targets))  # Try to connect up to 3 words
+        self.log(f"🤖 Generating AI suggestions...")
+        self.request_suggestions(show=True)
+    
+    def suggestion_key(self):
+        """Identifies the board state suggestions were computed for"""
+        return (self.game.current_team, self.game.revealed_mask)
+    
+    def request_suggestions(self, show=False):
+        """Compute suggestions off the Tk thread; optionally open the popup when done"""
+        key = self.suggestion_key()
+        if key in self.suggest_cache:
+            if show:
+                self.open_suggestions_window(self.suggest_cache[key])
+            return
         
-        self.log(f"🤖 Generating AI suggestions for {num_targets} words...")
-        clues = generate_all_clues(targets[:num_targets], all_board_words)
+        self.show_when_ready = self.show_when_ready or show
+        if self.suggest_pending == key:
+            return
         
-        if not clues:
+        self.suggest_job += 1
+        self.suggest_pending = key
+        self.suggest_jobs.put(('suggest', self.suggest_job, key, self.game.copy()))
+        self.suggest_progress.pack(side=tk.LEFT, padx=5, after=self.suggest_btn)
+        self.suggest_progress.start(10)
+        self.start_polling()
+    
+    def start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(50, self.poll_suggestions)
+    
+    def suggestion_worker(self):
+        """Background thread - must not touch Tk"""
+        while True:
+            kind, job, key, game = self.suggest_jobs.get()
+            if job != (self.auto_turn if kind == 'guess' else self.suggest_job):
+                continue  # Superseded while queued
+            try:
+                if kind == 'guess':
+                    result = plan_guesses(game)
+                else:
+                    with instrumentation.stage('suggest'):
+                        result = suggest_clues(game, scoring=self.scoring)
+                self.suggest_results.put((kind, job, key, result, None))
+            except Exception as exc:
+                self.suggest_results.put((kind, job, key, None, exc))
+    
+    def poll_suggestions(self):
+        """Deliver finished suggestion and operative jobs on the Tk thread"""
+        while True:
+            try:
+                kind, job, key, result, error = self.suggest_results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'guess':
+                self.deliver_auto_plan(job, result, error)
+                continue
+            if job != self.suggest_job:
+                continue  # Stale: the turn changed while it was running
+            
+            self.suggest_pending = None
+            self.suggest_progress.stop()
+            self.suggest_progress.pack_forget()
+            show, self.show_when_ready = self.show_when_ready, False
+            if instrumentation.enabled:
+                instrumentation.log_stats()
+            
+            if error is not None:
+                self.log(f"❌ AI suggestions failed: {error}")
+                if show:
+                    messagebox.showerror("AI Suggestions", f"Couldn't generate suggestions:\n{error}")
+                continue
+            
+            self.suggest_cache[key] = result
+            if show:
+                self.open_suggestions_window(result)
+        
+        if self.suggest_pending is not None or self.auto_pending == self.auto_turn:
+            self.root.after(50, self.poll_suggestions)
+        else:
+            self.polling = False
+    
+    def deliver_auto_plan(self, turn, plan, error):
+        if turn != self.auto_turn:
+            return  # Stale: the turn ended or auto-guess was restarted
+        self.auto_pending = None
+        if error is not None:
+            self.log(f"❌ Operative AI failed: {error}")
+            return
+        self.auto_plan = plan
+        self.root.after(AUTO_GUESS_DELAY_MS, self.auto_guess_step, turn)
+    
+    def cancel_suggestions(self):
+        """Drop queued or running suggestion jobs (their results are ignored)"""
+        self.suggest_job += 1
+        self.suggest_pending = None
+        self.show_when_ready = False
+        self.suggest_progress.stop()
+        self.suggest_progress.pack_forget()
+    
+    def open_suggestions_window(self, suggestions):
+        if not suggestions:
             messagebox.showinfo("No Clues", "Couldn't generate valid clues!")
             return
         
-        scored = score_clues(clues, targets[:num_targets], avoids + neutrals, assassins)
-        top_clues = sorted(scored.items(), key=lambda x: x[1], reverse=True)[:5]
-        
         # Show in popup window
         suggestions_window = tk.Toplevel(self.root)
         suggestions_window.title("AI Clue Suggestions")
-        suggestions_window.geometry("500x400")
+        suggestions_window.geometry("600x450")
         
         tk.Label(
             suggestions_window,
-            text=f"🤖 Top 5 AI Suggestions",
+            text=f"🤖 Top {len(suggestions)} AI Suggestions",
             font=('Arial', 16, 'bold')
         ).pack(pady=10)
         
-        tk.Label(
-            suggestions_window,
-            text=f"(Trying to connect: {', '.join(targets[:num_targets])})",
-            font=('Arial', 10, 'italic')
-        ).pack(pady=5)
-        
-        for i, (clue, score) in enumerate(top_clues, 1):
+        score_label = 'margin' if self.scoring == 'subsets' else self.scoring
+        for i, (clue, n, targets, margin) in enumerate(suggestions, 1):
             frame = tk.Frame(suggestions_window)
             frame.pack(fill=tk.X, padx=20, pady=5)
             
             tk.Label(
                 frame,
-                text=f"{i}. {clue.upper()}",
+                text=f"{i}. {clue.upper()} ({n})",
                 font=('Arial', 14, 'bold'),
-                width=15,
+                width=18,
                 anchor=tk.W
             ).pack(side=tk.LEFT)
             
             tk.Label(
                 frame,
-                text=f"(score: {score:.2f})",
+                text=f"→ {', '.join(targets)}  ({score_label}: {margin:+.2f})",
                 font=('Arial', 10),
                 fg='gray'
             ).pack(side=tk.LEFT, padx=10)
@@ -449,6 +653,15 @@ class CodenamesGUI:
         self.log_text.see(tk.END)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Codenames GUI")
+    parser.add_argument('--words', type=int, default=25, help="cards on the board")
+    parser.add_argument('--seed', type=int, help="deal a reproducible board")
+    parser.add_argument('--scoring', default='subsets', choices=scoring_mode_names(),
+                        help="how AI suggestions are ranked")
+    parser.add_argument('--debug', action='store_true', help="log every card repaint")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING)
+    
     root = tk.Tk()
-    app = CodenamesGUI(root)
+    app = CodenamesGUI(root, num_words=args.words, seed=args.seed, scoring=args.scoring)
     root.mainloop()
\ No newline at end of file
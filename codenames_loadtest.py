@@ -0,0 +1,225 @@
+"""Load test for codenames_server: many simulated players over keep-alive HTTP.
+
+Each connection creates its own game and then loops through a spymaster /
+operative cycle (state, clue, guesses, end turn), asking for AI suggestions
+on a fraction of turns. Reports requests per second and latency percentiles
+per endpoint.
+
+    python codenames_server.py --port 8765 &
+    python codenames_loadtest.py --port 8765 --connections 200 --duration 30
+
+    # or let the load test start (and stop) a server itself
+    python codenames_loadtest.py --spawn --vectors small_vectors.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection, requests issued one at a time"""
+
+    def __init__(self, host, port, latencies):
+        self.host = host
+        self.port = port
+        self.latencies = latencies  # endpoint -> [seconds]
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    async def request(self, method, path, endpoint, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        start = time.perf_counter()
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode('latin-1')
+            + data
+        )
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        payload = json.loads(await self.reader.readexactly(length)) if length else {}
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        return status, payload
+
+
+async def player(client, rng, deadline, suggest_ratio, errors):
+    """Play games back to back until the deadline"""
+    await client.connect()
+    try:
+        while time.perf_counter() < deadline:
+            status, created = await client.request(
+                'POST', '/games', 'create', {'seed': rng.randrange(1 << 30), 'spymaster': True}
+            )
+            if status != 201:
+                errors[status] += 1
+                return
+            game_id = created['id']
+            cards = created['state']['cards']
+            while time.perf_counter() < deadline:
+                status, reply = await client.request('GET', f'/games/{game_id}', 'state')
+                state = reply['state']
+                if state['game_over']:
+                    break
+                team = state['current_team']
+                unrevealed = [c['word'] for c in state['cards'] if not c['revealed']]
+                clue, n = None, 1
+                if rng.random() < suggest_ratio:
+                    status, reply = await client.request(
+                        'GET', f'/games/{game_id}/suggestions?top_k=1', 'suggestions'
+                    )
+                    if status == 200 and reply['suggestions']:
+                        clue, n = reply['suggestions'][0]['clue'], reply['suggestions'][0]['n']
+                    elif status != 200:
+                        errors[status] += 1
+                if clue is None:
+                    clue = rng.choice(('thing', 'object', 'entity', 'matter', 'whole'))
+                status, _ = await client.request(
+                    'POST', f'/games/{game_id}/clue', 'clue', {'clue': clue, 'n': n}
+                )
+                if status != 200:
+                    # Illegal on this board: pass instead
+                    await client.request('POST', f'/games/{game_id}/end_turn', 'end_turn')
+                    continue
+                own = [c['word'] for c in cards if c['color'] == team and c['word'] in unrevealed]
+                for _ in range(n):
+                    # Mostly right guesses, sometimes a random card
+                    pool = own if own and rng.random() < 0.7 else unrevealed
+                    word = rng.choice(pool)
+                    status, reply = await client.request(
+                        'POST', f'/games/{game_id}/guess', 'guess', {'word': word}
+                    )
+                    if status != 200:
+                        errors[status] += 1
+                        break
+                    unrevealed.remove(word)
+                    if word in own:
+                        own.remove(word)
+                    if reply['turn_over'] or reply['state']['game_over']:
+                        break
+                else:
+                    await client.request('POST', f'/games/{game_id}/end_turn', 'end_turn')
+            await client.request('DELETE', f'/games/{game_id}', 'delete')
+    except (ConnectionError, asyncio.IncompleteReadError):
+        errors['connection'] += 1
+    finally:
+        await client.close()
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies, elapsed, errors):
+    endpoints = {}
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        endpoints[name] = {
+            'count': len(values),
+            'p50_ms': 1000 * percentile(values, 0.50),
+            'p95_ms': 1000 * percentile(values, 0.95),
+            'p99_ms': 1000 * percentile(values, 0.99),
+            'max_ms': 1000 * values[-1],
+        }
+    everything = sorted(v for values in latencies.values() for v in values)
+    total = len(everything)
+    return {
+        'requests': total,
+        'elapsed_s': elapsed,
+        'rps': total / elapsed if elapsed else 0.0,
+        'p50_ms': 1000 * percentile(everything, 0.50) if total else 0.0,
+        'p99_ms': 1000 * percentile(everything, 0.99) if total else 0.0,
+        'max_ms': 1000 * everything[-1] if total else 0.0,
+        'errors': {str(k): v for k, v in errors.items()},
+        'endpoints': endpoints,
+    }
+
+
+async def run_load(host, port, connections=100, duration=10.0, suggest_ratio=0.1, seed=0):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        player(Client(host, port, latencies), random.Random(rng.random()), deadline, suggest_ratio, errors)
+        for _ in range(connections)
+    ))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def spawn_server(args):
+    """Start codenames_server.py on a free port; returns (process, port)"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codenames_server.py')
+    command = [sys.executable, server, '--port', str(port)]
+    if args.workers is not None:
+        command += ['--workers', str(args.workers)]
+    if args.vectors:
+        command += ['--vectors', args.vectors]
+    if args.vector_store:
+        command += ['--vector-store', args.vector_store]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # "listening on ..." once the workers are configured
+    return process, port
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for codenames_server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--suggest-ratio', type=float, default=0.1,
+                        help="fraction of turns that ask for AI suggestions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    parser.add_argument('--spawn', action='store_true', help="start a local server for the run")
+    parser.add_argument('--workers', type=int, help="with --spawn: suggestion worker processes")
+    parser.add_argument('--vectors', help="with --spawn: local word2vec/GloVe text file")
+    parser.add_argument('--vector-store', help="with --spawn: directory from build_vector_store()")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server, args.port = spawn_server(args)
+    try:
+        summary = asyncio.run(run_load(
+            args.host, args.port, args.connections, args.duration, args.suggest_ratio, args.seed
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Requests: {summary['requests']} in {summary['elapsed_s']:.1f} s"
+              f" ({summary['rps']:.0f} req/s)")
+        print(f"Latency: p50 {summary['p50_ms']:.2f} ms  p99 {summary['p99_ms']:.2f} ms"
+              f"  max {summary['max_ms']:.2f} ms")
+        if summary['errors']:
+            print(f"Errors: {summary['errors']}")
+        for name, e in summary['endpoints'].items():
+            print(f"  {name:<12} {e['count']:7d}  p50 {e['p50_ms']:7.2f}  p95 {e['p95_ms']:7.2f}"
+                  f"  p99 {e['p99_ms']:7.2f}  max {e['max_ms']:8.2f} ms")
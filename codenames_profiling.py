@@ -0,0 +1,146 @@
+"""Opt-in instrumentation for the suggestion pipeline.
+
+Stage timers, counters and optional cProfile capture. Everything is a no-op
+until enabled, so the hooks can stay in hot code:
+
+    from codenames_profiling import instrumentation
+    instrumentation.enable(profile=['score'])
+    ... run suggestions ...
+    print(instrumentation.stats())
+
+Set CODENAMES_INSTRUMENT=1 to enable at import (and optionally
+CODENAMES_PROFILE_STAGES=generate,score to cProfile those stages).
+"""
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+
+logger = logging.getLogger('codenames.profiling')
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.profiler = None
+
+    def __enter__(self):
+        if self.name in self.owner.profile_stages:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.owner._record(self.name, elapsed, self.profiler)
+        return False
+
+
+class Instrumentation:
+    """Per-stage timers and counters; cheap no-ops while disabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self.profile_stages = frozenset()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, profile=()):
+        """Start collecting. Stages named in profile also run under cProfile."""
+        self.profile_stages = frozenset(profile)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.timers = defaultdict(lambda: [0, 0.0])  # name -> [calls, seconds]
+            self.counters = Counter()
+            self.profiles = {}
+
+    def stage(self, name):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function as a stage"""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += n
+
+    def _record(self, name, elapsed, profiler):
+        with self._lock:
+            timer = self.timers[name]
+            timer[0] += 1
+            timer[1] += elapsed
+            if profiler is not None:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(20)
+                self.profiles[name] = out.getvalue()
+
+    def stats(self):
+        """Plain dict of everything collected so far"""
+        with self._lock:
+            return {
+                'stages': {
+                    name: {
+                        'calls': calls,
+                        'total_ms': 1000 * seconds,
+                        'mean_ms': 1000 * seconds / calls,
+                    }
+                    for name, (calls, seconds) in self.timers.items()
+                },
+                'counters': dict(self.counters),
+                'profiles': dict(self.profiles),
+            }
+
+    def log_stats(self, log=None, level=logging.INFO):
+        """Emit the stats (without profile text) as one structured log line"""
+        stats = self.stats()
+        stats.pop('profiles')
+        (log or logger).log(level, "suggestion stats %s", json.dumps(stats, sort_keys=True))
+
+
+instrumentation = Instrumentation()
+
+if os.environ.get('CODENAMES_INSTRUMENT'):
+    instrumentation.enable(
+        profile=[s for s in os.environ.get('CODENAMES_PROFILE_STAGES', '').split(',') if s]
+    )
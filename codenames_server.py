@@ -0,0 +1,438 @@
+"""Multi-game HTTP service: many CodenamesGame sessions in one asyncio process.
+
+Plain HTTP/1.1 with JSON bodies (keep-alive supported), standard library only.
+Game moves run on the event loop; suggestion scoring is shipped to a process
+pool as to_bytes() snapshots so a slow suggestion never stalls other games.
+
+    python codenames_server.py --port 8765 --workers 4 --vector-store ~/.cache/codenames/glove
+
+Endpoints:
+    POST   /games                    {"seed": 1, "num_words": 25}   new session
+    GET    /games/<id>[?spymaster=1] board, revealed colors, turn state
+    POST   /games/<id>/clue          {"clue": "fruit", "n": 2}
+    POST   /games/<id>/guess         {"word": "apple"}
+    POST   /games/<id>/end_turn
+    GET    /games/<id>/suggestions   [?top_k=5&risk_aversion=2.0&max_size=4&scoring=subsets]
+    DELETE /games/<id>
+    GET    /stats
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import secrets
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import codenames_embeddings
+from codenames_artifacts import load_clue_index, load_noun_pool
+from codenames_game import (
+    CodenamesGame, check_scoring_mode, get_stemmer, is_illegal_clue, setup_game, suggest_clues,
+)
+
+logger = logging.getLogger('codenames.server')
+
+MAX_BODY = 64 * 1024
+MIN_BOARD_WORDS = 5
+MAX_BOARD_WORDS = 255
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================
+# SUGGESTION WORKERS (run in child processes)
+# ============================================
+
+def _init_worker(vectors, vector_store):
+    if vector_store:
+        codenames_embeddings.use_vector_store(vector_store)
+    elif vectors:
+        codenames_embeddings.use_vector_file(vectors)
+    load_noun_pool()
+    load_clue_index()
+    codenames_embeddings.get_model()
+
+
+def _ready():
+    return os.getpid()
+
+
+def _suggest(state, options):
+    # Decoding memoizes the board layout, so a worker that sees the same
+    # board again reuses its similarity cache from earlier turns
+    game = CodenamesGame.from_bytes(state)
+    return [
+        {'clue': clue, 'n': n, 'targets': list(targets), 'margin': float(margin)}
+        for clue, n, targets, margin in suggest_clues(game, **options)
+    ]
+
+
+# ============================================
+# SESSIONS
+# ============================================
+
+def game_view(game, spymaster=False):
+    """JSON-friendly state; unrevealed colors only for the spymaster"""
+    return {
+        'cards': [
+            {'word': word, 'color': color if spymaster or game.is_revealed(word) else None,
+             'revealed': game.is_revealed(word)}
+            for word, color in game.board
+        ],
+        'current_team': game.current_team,
+        'current_clue': game.current_clue,
+        'current_n': game.current_n,
+        'guesses_made': game.guesses_made,
+        'remaining': game.get_counts(),
+        'game_over': game.game_over,
+        'winner': game.winner,
+    }
+
+
+class Session:
+    __slots__ = ('game', 'last_used', 'suggestions')
+
+    def __init__(self, game):
+        self.game = game
+        self.last_used = time.monotonic()
+        self.suggestions = {}  # (team, revealed_mask, options) -> Future
+
+
+class GameServer:
+    """Session store plus the request handlers"""
+
+    def __init__(self, workers=None, vectors=None, vector_store=None,
+                 max_sessions=100000, session_ttl=3600):
+        self.sessions = {}
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.workers = os.cpu_count() if workers is None else workers
+        self.pool = None
+        if self.workers > 0:
+            self.pool = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(vectors, vector_store)
+            )
+        else:
+            _init_worker(vectors, vector_store)
+        # Anything a move handler loads lazily would otherwise stall the loop
+        load_noun_pool()
+        get_stemmer()
+        self.requests = 0
+        self.suggestion_jobs = 0
+        self.started = time.monotonic()
+
+    async def start_workers(self):
+        """Spawn and initialize the suggestion workers before taking traffic"""
+        if self.pool is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(self.workers)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    # ---------- sessions ----------
+
+    def session(self, game_id):
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise HTTPError(404, f"No game {game_id!r}")
+        session.last_used = time.monotonic()
+        return session
+
+    def expire_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        stale = [k for k, s in self.sessions.items() if s.last_used < cutoff]
+        for key in stale:
+            del self.sessions[key]
+        return len(stale)
+
+    async def sweep_sessions(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            expired = self.expire_sessions()
+            if expired:
+                logger.info("expired %d idle sessions", expired)
+
+    # ---------- handlers ----------
+
+    def create_game(self, body):
+        if len(self.sessions) >= self.max_sessions and not self.expire_sessions():
+            raise HTTPError(503, "Too many sessions")
+        if 'state' in body:
+            if not isinstance(body['state'], str):
+                raise HTTPError(400, "state must be a hex string")
+            try:
+                game = CodenamesGame.from_bytes(bytes.fromhex(body['state']))
+            except ValueError as exc:
+                raise HTTPError(400, str(exc))
+        else:
+            num_words, seed = body.get('num_words', 25), body.get('seed')
+            # Snapshots (GET, suggestions) hold the board size in one byte
+            max_words = min(MAX_BOARD_WORDS, len(load_noun_pool()))
+            if type(num_words) is not int or not MIN_BOARD_WORDS <= num_words <= max_words:
+                raise HTTPError(400, f"num_words must be an integer from {MIN_BOARD_WORDS} to {max_words}")
+            if seed is not None and type(seed) not in (int, str):
+                raise HTTPError(400, "seed must be an integer or a string")
+            try:
+                board, team = setup_game(num_words=num_words, seed=seed)
+            except ValueError as exc:
+                raise HTTPError(400, str(exc))
+            game = CodenamesGame(board, team)
+        game_id = secrets.token_hex(8)
+        self.sessions[game_id] = Session(game)
+        return 201, {'id': game_id, 'state': game_view(game, body.get('spymaster', False))}
+
+    def get_game(self, game_id, query):
+        game = self.session(game_id).game
+        return 200, {'state': game_view(game, query.get('spymaster') == '1'),
+                     'snapshot': game.to_bytes().hex()}
+
+    def set_clue(self, game_id, body):
+        game = self.session(game_id).game
+        if game.game_over:
+            raise HTTPError(409, "Game is over")
+        if game.current_clue:
+            # set_clue() would reset guesses_made and the turn would never end
+            raise HTTPError(409, "A clue was already given this turn")
+        clue = str(body.get('clue', '')).strip().lower()
+        try:
+            n = int(body.get('n', 0))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "n must be an integer")
+        if not clue:
+            raise HTTPError(400, "Missing clue")
+        targets = game.get_counts()[game.current_team]
+        if not 1 <= n <= targets:
+            raise HTTPError(400, f"n must be between 1 and {targets}")
+        if is_illegal_clue(clue, game.legality):
+            raise HTTPError(400, f"'{clue}' is illegal: it contains or matches a board word")
+        game.set_clue(clue, n)
+        return 200, {'state': game_view(game)}
+
+    def make_guess(self, game_id, body):
+        game = self.session(game_id).game
+        if game.game_over:
+            raise HTTPError(409, "Game is over")
+        if not game.current_clue:
+            raise HTTPError(409, "Spymaster must give a clue first")
+        success, color, message = game.make_guess(str(body.get('word', '')))
+        turn_over = False
+        if success and not game.game_over and game.should_end_turn(color):
+            turn_over = True
+            if color == game.current_team:
+                # All guesses correct: same team gives a new clue (as in the GUI)
+                game.set_clue(None, 0)
+            else:
+                game.end_turn()
+        status = 200 if success else 400
+        return status, {'success': success, 'color': color, 'message': message,
+                        'turn_over': turn_over, 'state': game_view(game)}
+
+    def end_turn(self, game_id, body):
+        game = self.session(game_id).game
+        if game.game_over:
+            raise HTTPError(409, "Game is over")
+        game.end_turn()
+        return 200, {'state': game_view(game)}
+
+    async def suggestions(self, game_id, query):
+        session = self.session(game_id)
+        game = session.game
+        if game.game_over:
+            raise HTTPError(409, "Game is over")
+        try:
+            options = {
+                'top_k': int(query.get('top_k', 5)),
+                'max_size': int(query.get('max_size', 4)),
+                'risk_aversion': float(query.get('risk_aversion', 2.0)),
+                'scoring': check_scoring_mode(query.get('scoring', 'subsets')),
+            }
+        except ValueError:
+            raise HTTPError(400, "Bad suggestion options")
+        if options['top_k'] < 1 or options['max_size'] < 1:
+            raise HTTPError(400, "top_k and max_size must be at least 1")
+        if not math.isfinite(options['risk_aversion']):
+            raise HTTPError(400, "risk_aversion must be a finite number")
+        key = (game.current_team, game.revealed_mask, tuple(sorted(options.items())))
+        # Concurrent requests for the same position share one job
+        future = session.suggestions.get(key)
+        if future is None:
+            self.suggestion_jobs += 1
+            # pool=None runs in the loop's default thread pool instead
+            future = asyncio.get_running_loop().run_in_executor(
+                self.pool, _suggest, game.to_bytes(), options
+            )
+            session.suggestions = {key: future}  # older positions are stale
+        try:
+            result = await asyncio.shield(future)
+        except Exception:
+            session.suggestions.pop(key, None)
+            raise
+        return 200, {'suggestions': result}
+
+    def delete_game(self, game_id):
+        self.session(game_id)
+        del self.sessions[game_id]
+        return 200, {'deleted': game_id}
+
+    def stats(self):
+        return 200, {
+            'sessions': len(self.sessions),
+            'requests': self.requests,
+            'suggestion_jobs': self.suggestion_jobs,
+            'workers': self.workers,
+            'uptime_s': time.monotonic() - self.started,
+        }
+
+    async def dispatch(self, method, path, query, body):
+        parts = [p for p in path.split('/') if p]
+        if parts == ['stats'] and method == 'GET':
+            return self.stats()
+        if not parts or parts[0] != 'games':
+            raise HTTPError(404, f"No route for {path}")
+        if len(parts) == 1:
+            if method == 'POST':
+                return self.create_game(body)
+        elif len(parts) == 2:
+            if method == 'GET':
+                return self.get_game(parts[1], query)
+            if method == 'DELETE':
+                return self.delete_game(parts[1])
+        elif len(parts) == 3:
+            game_id, action = parts[1], parts[2]
+            if action == 'suggestions' and method == 'GET':
+                return await self.suggestions(game_id, query)
+            handler = {'clue': self.set_clue, 'guess': self.make_guess,
+                       'end_turn': self.end_turn}.get(action)
+            if handler is not None and method == 'POST':
+                return handler(game_id, body)
+            if handler is None:
+                raise HTTPError(404, f"No route for {path}")
+        raise HTTPError(405, f"{method} not allowed on {path}")
+
+    # ---------- HTTP ----------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                keep_alive = await self.handle_request(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except asyncio.LimitOverrunError:
+            pass
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, head, reader, writer):
+        self.requests += 1
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            self.respond(writer, 400, {'error': 'Malformed request line'}, False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+        try:
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                raise HTTPError(400, "Bad Content-Length")
+            if length < 0:
+                raise HTTPError(400, "Bad Content-Length")
+            if length > MAX_BODY:
+                raise HTTPError(413, "Body too large")
+            raw = await reader.readexactly(length) if length else b''
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                raise HTTPError(400, "Body is not valid JSON")
+            if not isinstance(body, dict):
+                raise HTTPError(400, "Body must be a JSON object")
+            url = urlsplit(target)
+            status, payload = await self.dispatch(method, url.path, dict(parse_qsl(url.query)), body)
+        except HTTPError as exc:
+            status, payload = exc.status, {'error': str(exc)}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return False
+        except Exception:
+            logger.exception("request failed: %s %s", method, target)
+            status, payload = 500, {'error': 'Internal error'}
+        self.respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+            + body
+        )
+
+
+async def serve(host='127.0.0.1', port=8765, **options):
+    """Run until SIGINT/SIGTERM, then shut the worker pool down"""
+    app = GameServer(**options)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await app.start_workers()
+        server = await asyncio.start_server(app.handle_connection, host, port)
+        sweeper = asyncio.create_task(app.sweep_sessions())
+        addresses = ', '.join(str(s.getsockname()) for s in server.sockets)
+        logger.info("serving on %s (%d suggestion workers)", addresses, app.workers)
+        print(f"Codenames server listening on {addresses}", flush=True)
+        async with server:
+            await stop.wait()
+        sweeper.cancel()
+    finally:
+        app.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Codenames multi-game HTTP server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="suggestion worker processes (default: CPU count, 0 = in-process thread)")
+    parser.add_argument('--vectors', help="local word2vec/GloVe text file")
+    parser.add_argument('--vector-store', help="directory from build_vector_store()")
+    parser.add_argument('--max-sessions', type=int, default=100000)
+    parser.add_argument('--session-ttl', type=float, default=3600, help="idle seconds before a game is dropped")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(
+        args.host, args.port, workers=args.workers, vectors=args.vectors,
+        vector_store=args.vector_store, max_sessions=args.max_sessions,
+        session_ttl=args.session_ttl,
+    ))
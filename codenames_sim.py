@@ -0,0 +1,200 @@
+"""Headless self-play: AI spymaster vs AI operative, no GUI.
+
+Plays complete games to measure clue quality (win / assassin rates) and
+engine throughput. Games fan out over a process pool; point every worker at
+a memory-mapped vector store (see codenames_embeddings) so they share one
+read-only copy of the model.
+
+    python codenames_sim.py --games 500 --workers 4 --vector-store ~/.cache/codenames/glove
+    python codenames_sim.py --games 50 --vectors small_vectors.txt
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import codenames_embeddings
+from codenames_artifacts import load_clue_index, load_noun_pool, load_wup_table
+from codenames_ann import load_ann_index
+from codenames_game import (
+    ASSASSIN, MIN_GUESS_CONFIDENCE, CodenamesGame, plan_guesses, play_guesses, scoring_mode_names,
+    set_wordnet_weight, suggest_clues,
+)
+from codenames_profiling import instrumentation
+
+PHASES = ('setup', 'generate', 'ann', 'score', 'rank', 'guess')
+
+
+# ============================================
+# PLAYERS
+# ============================================
+
+def spymaster_move(game, max_size=4, risk_aversion=2.0, use_ann=False, scoring='subsets'):
+    """Best clue for the current team and the number of words it targets, or None"""
+    suggestions = suggest_clues(
+        game, max_size=max_size, top_k=1, risk_aversion=risk_aversion, use_ann=use_ann,
+        scoring=scoring,
+    )
+    if not suggestions:
+        return None
+    clue, n, _, _ = suggestions[0]
+    return clue, n
+
+
+def operative_turn(game, min_confidence=MIN_GUESS_CONFIDENCE):
+    """Guess the words most similar to the clue until the turn ends or confidence runs out"""
+    return play_guesses(game, plan_guesses(game, min_confidence))
+
+
+# ============================================
+# GAMES
+# ============================================
+
+def play_game(seed, max_size=4, risk_aversion=2.0, max_turns=50, use_ann=False, scoring='subsets',
+              min_confidence=MIN_GUESS_CONFIDENCE):
+    """
+    Play one game to the end (or max_turns clues). Returns a result dict.
+
+    Phase timings come from the instrumentation stages, which suggest_clues
+    already reports (generate / score / rank).
+    """
+    instrumentation.reset()
+    with instrumentation.stage('setup'):
+        game = CodenamesGame(seed=seed)
+    starting_team = game.current_team
+
+    turns = 0
+    while not game.game_over and turns < max_turns:
+        turns += 1
+        move = spymaster_move(game, max_size, risk_aversion, use_ann, scoring)
+        if move is None:
+            game.end_turn()
+            continue
+        game.set_clue(*move)
+        with instrumentation.stage('guess'):
+            operative_turn(game, min_confidence)
+
+    stages = instrumentation.stats()['stages']
+    assassin_hit = game.remaining[ASSASSIN] == 0
+    return {
+        'seed': seed,
+        'starting_team': starting_team,
+        'winner': game.winner,
+        'assassin': assassin_hit,
+        'turns': turns,
+        'timings': {p: stages[p]['total_ms'] / 1000 if p in stages else 0.0 for p in PHASES},
+    }
+
+
+def _play_games(seeds, max_size, risk_aversion, max_turns, use_ann, scoring, min_confidence):
+    return [
+        play_game(seed, max_size, risk_aversion, max_turns, use_ann, scoring, min_confidence)
+        for seed in seeds
+    ]
+
+
+def _init_worker(vectors, vector_store, use_ann=False, wordnet_weight=0.0):
+    if vector_store:
+        codenames_embeddings.use_vector_store(vector_store)
+    elif vectors:
+        codenames_embeddings.use_vector_file(vectors)
+    # Load shared resources up front so phase timings measure steady state
+    load_noun_pool()
+    load_clue_index()
+    codenames_embeddings.get_model()
+    if use_ann:
+        load_ann_index()
+    set_wordnet_weight(wordnet_weight)
+    if wordnet_weight:
+        load_wup_table()
+    instrumentation.enable()
+
+
+def summarize(results, elapsed):
+    games = len(results)
+    winners = Counter(r['winner'] for r in results)
+    finished = games - winners[None]
+    phases = {p: sum(r['timings'][p] for r in results) for p in PHASES}
+    return {
+        'games': games,
+        'finished': finished,
+        'red_wins': winners['red'],
+        'blue_wins': winners['blue'],
+        'starting_team_win_rate': sum(r['winner'] == r['starting_team'] for r in results) / games,
+        # Games decided by a team clearing its words rather than by the assassin
+        'win_rate': sum(r['winner'] is not None and not r['assassin'] for r in results) / games,
+        'assassin_rate': sum(r['assassin'] for r in results) / games,
+        'avg_turns': sum(r['turns'] for r in results) / games,
+        'elapsed_s': elapsed,
+        'games_per_s': games / elapsed if elapsed else float('inf'),
+        'phase_ms_per_game': {p: 1000 * t / games for p, t in phases.items()},
+    }
+
+
+def run_simulation(num_games, workers=1, seed=0, max_size=4, risk_aversion=2.0,
+                   max_turns=50, vectors=None, vector_store=None, use_ann=False, chunk_size=10,
+                   wordnet_weight=0.0, scoring='subsets', min_confidence=MIN_GUESS_CONFIDENCE):
+    """Play num_games seeded games (seed, seed+1, ...) and return a summary dict"""
+    seeds = list(range(seed, seed + num_games))
+    start = time.perf_counter()
+    if workers <= 1:
+        _init_worker(vectors, vector_store, use_ann, wordnet_weight)
+        results = _play_games(
+            seeds, max_size, risk_aversion, max_turns, use_ann, scoring, min_confidence
+        )
+    else:
+        chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(vectors, vector_store, use_ann, wordnet_weight)) as pool:
+            futures = [
+                pool.submit(_play_games, chunk, max_size, risk_aversion, max_turns, use_ann,
+                            scoring, min_confidence)
+                for chunk in chunks
+            ]
+            for future in futures:
+                results.extend(future.result())
+    return summarize(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Codenames self-play")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-size', type=int, default=4, help="most words one clue may target")
+    parser.add_argument('--risk-aversion', type=float, default=2.0)
+    parser.add_argument('--max-turns', type=int, default=50)
+    parser.add_argument('--vectors', help="local word2vec/GloVe text file")
+    parser.add_argument('--vector-store', help="directory from build_vector_store()")
+    parser.add_argument('--ann', action='store_true',
+                        help="add nearest-neighbour clue candidates from the whole vocabulary")
+    parser.add_argument('--wordnet-weight', type=float, default=0.0,
+                        help="blend this share of WordNet Wu-Palmer similarity into scoring")
+    parser.add_argument('--scoring', default='subsets', choices=scoring_mode_names(),
+                        help="how the spymaster ranks clues")
+    parser.add_argument('--min-confidence', type=float, default=MIN_GUESS_CONFIDENCE,
+                        help="operatives pass instead of guessing below this confidence")
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = run_simulation(
+        args.games, workers=args.workers, seed=args.seed, max_size=args.max_size,
+        risk_aversion=args.risk_aversion, max_turns=args.max_turns,
+        vectors=args.vectors, vector_store=args.vector_store, use_ann=args.ann,
+        wordnet_weight=args.wordnet_weight, scoring=args.scoring,
+        min_confidence=args.min_confidence,
+    )
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Games: {summary['games']} ({summary['finished']} finished)")
+        print(f"Red/Blue wins: {summary['red_wins']}/{summary['blue_wins']}")
+        print(f"Win rate (no assassin): {summary['win_rate']:.1%}")
+        print(f"Assassin rate: {summary['assassin_rate']:.1%}")
+        print(f"Starting team win rate: {summary['starting_team_win_rate']:.1%}")
+        print(f"Avg turns: {summary['avg_turns']:.1f}")
+        print(f"Throughput: {summary['games_per_s']:.1f} games/s")
+        for phase, ms in summary['phase_ms_per_game'].items():
+            print(f"  {phase:<9} {ms:8.2f} ms/game")
@@ -0,0 +1,110 @@
+"""Binary game snapshots: round trips, replays against unserialized play, malformed input"""
+import random
+
+import pytest
+
+pytest.importorskip('nltk')
+
+from codenames_game import CodenamesGame, get_wordnet, setup_game
+
+
+@pytest.fixture(scope='module', autouse=True)
+def wordnet():
+    # The pool encoding needs the noun pool, which is built from WordNet
+    try:
+        get_wordnet().ensure_loaded()
+    except LookupError:
+        pytest.skip("WordNet data not installed")
+
+
+def sample_states():
+    states = []
+    for seed in range(10):
+        game = CodenamesGame(seed=seed)
+        if seed % 2:
+            game.set_clue('thing', 2)
+            game.make_guess(game.get_unrevealed_by_color(game.current_team)[0])
+        states.append(game)
+        # Words outside the noun pool are stored inline
+        board, team = setup_game(seed=seed, word_pool=[f'zz{i}' for i in range(40)])
+        inline = CodenamesGame(board, team)
+        inline.set_clue('héllo', 1)
+        states.append(inline)
+    return states
+
+
+def play_randomly(game, rng, decode_each_step):
+    """Random clues and guesses to the end; yields (guess result, state dict) per guess"""
+    while not game.game_over:
+        game.set_clue('clue', rng.randint(1, 3))
+        while True:
+            if decode_each_step:
+                game = CodenamesGame.from_bytes(game.to_bytes())
+            word = rng.choice([w for w in game.get_all_words() if not game.is_revealed(w)])
+            success, color, message = game.make_guess(word)
+            yield (success, color, message), game.to_dict()
+            if game.game_over or game.should_end_turn(color):
+                break
+        game.end_turn()
+
+
+@pytest.mark.parametrize('index', range(20))
+def test_round_trip(index):
+    game = sample_states()[index]
+    data = game.to_bytes()
+    decoded = CodenamesGame.from_bytes(data)
+    assert decoded.to_dict() == game.to_dict()
+    assert decoded.to_bytes() == data
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_replay_through_snapshots_matches_direct_play(seed):
+    direct = play_randomly(CodenamesGame(seed=seed), random.Random(seed), False)
+    replayed = play_randomly(CodenamesGame(seed=seed), random.Random(seed), True)
+    steps = list(direct)
+    assert steps == list(replayed)
+    assert steps[-1][1]['game_over']
+
+
+def test_decoded_state_matches_json_state():
+    game = CodenamesGame(seed=3)
+    for _ in zip(play_randomly(game, random.Random(3), False), range(6)):
+        pass
+    state = CodenamesGame.from_bytes(game.to_bytes())
+    assert state.to_dict() == CodenamesGame.from_json(game.to_json()).to_dict()
+
+
+def test_truncated_or_padded_states_are_rejected():
+    for game in sample_states():
+        data = game.to_bytes()
+        for cut in range(len(data)):
+            with pytest.raises(ValueError):
+                CodenamesGame.from_bytes(data[:cut])
+        with pytest.raises(ValueError):
+            CodenamesGame.from_bytes(data + b'\0')
+
+
+def test_bad_codes_and_masks_are_rejected():
+    data = bytearray(CodenamesGame(seed=0).to_bytes())
+    team = bytearray(data)
+    team[5] = 7
+    with pytest.raises(ValueError):
+        CodenamesGame.from_bytes(bytes(team))
+    # Reveal bit for a card past the end of the 25-card board
+    mask = bytearray(data)
+    mask[-1] |= 0x80
+    with pytest.raises(ValueError):
+        CodenamesGame.from_bytes(bytes(mask))
+
+
+def test_corrupted_states_raise_only_value_error():
+    rng = random.Random(0)
+    states = [game.to_bytes() for game in sample_states()]
+    for _ in range(2000):
+        data = bytearray(rng.choice(states))
+        for _ in range(rng.randint(1, 3)):
+            data[rng.randrange(len(data))] = rng.randrange(256)
+        try:
+            CodenamesGame.from_bytes(bytes(data))
+        except ValueError:
+            pass
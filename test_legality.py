@@ -0,0 +1,50 @@
+"""BoardLegalityIndex must accept and reject exactly what the list path of is_illegal_clue does"""
+import random
+
+import pytest
+
+pytest.importorskip('nltk')
+
+from codenames_game import BoardLegalityIndex, is_illegal_clue
+
+VOCABULARY = [
+    'apple', 'apples', 'fire', 'truck', 'fire_truck', 'ice-cream', 'sea horse', 'horse', 'horses',
+    'run', 'running', 'runner', 'berry', 'berries', 'cat', 'catalog', 'dog', 'hotdog', 'Paris',
+    'glass', 'glasses', 'box', 'boxes', 'mouse', 'mice', 'a', 'i', 'an', 'ant', 'antelope',
+    'organize', 'organization', 'fly', 'flies', 'study', 'studied', 'crab', 'crabapple',
+]
+
+
+def clue_variants(word, rng):
+    """Clues built around a board word: substrings, plurals, compounds, case changes"""
+    i = rng.randrange(len(word))
+    j = rng.randrange(i + 1, len(word) + 1)
+    other = rng.choice(VOCABULARY)
+    return [
+        word, word.upper(), word[i:j], word[:-1], word + 's', word + 'es', word + 'ing', word + 'ed',
+        f"{word}_{other}", f"{other}-{word}", f"{word} {other}", f"{other}{word}", '',
+    ]
+
+
+def check(clues, board):
+    index = BoardLegalityIndex(board)
+    for clue in clues:
+        assert index.is_illegal(clue) == is_illegal_clue(clue, board), (clue, board)
+
+
+def test_fixed_cases():
+    board = ['Fire_Truck', 'apple', 'sea horse', 'running']
+    check(['', 'fire', 'truck', 'FIRE_TRUCK', 'apples', 'pineapple', 'app', 'horse', 'seahorse',
+           'runs', 'run', 'runner', 'ice-cream', 'banana', ' ', '_'], board)
+    check(['', 'apple', 'x'], [])
+    check(['', 'apple', 'x'], [''])
+
+
+def test_random_boards():
+    rng = random.Random(0)
+    for _ in range(300):
+        board = rng.sample(VOCABULARY, rng.randint(1, 8))
+        clues = clue_variants(rng.choice(board), rng)
+        clues += [rng.choice(VOCABULARY) for _ in range(5)]
+        clues += [''.join(rng.choice('aeinorst_- ') for _ in range(rng.randint(1, 6))) for _ in range(5)]
+        check(clues, board)
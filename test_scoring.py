@@ -0,0 +1,57 @@
+"""Vectorized score_clues against the per-pair word2vec_similarity sum it replaced"""
+import numpy as np
+import pytest
+
+pytest.importorskip('gensim')
+
+from gensim.models import KeyedVectors
+
+import codenames_embeddings
+import codenames_game
+from codenames_game import score_clues, word2vec_similarity
+
+WORDS = ['fruit', 'apple', 'banana', 'cherry', 'car', 'truck', 'river', 'bank', 'poison', 'music']
+
+
+@pytest.fixture
+def tiny_model(monkeypatch):
+    rng = np.random.default_rng(0)
+    model = KeyedVectors(vector_size=8)
+    model.add_vectors(WORDS, rng.normal(size=(len(WORDS), 8)).astype(np.float32))
+    # Put back whatever model (if any) was loaded before
+    monkeypatch.setattr(codenames_embeddings.provider, '_model', codenames_embeddings.provider._model)
+    monkeypatch.setattr(codenames_game, '_wordnet_weight', 0.0)
+    codenames_embeddings.set_model(model)
+    return model
+
+
+def per_pair_scores(clues, targets, avoid, assassins, risk_aversion):
+    return {
+        clue: sum(word2vec_similarity(clue, w) for w in targets)
+        - sum(word2vec_similarity(clue, w) for w in avoid)
+        - risk_aversion * sum(word2vec_similarity(clue, w) for w in assassins)
+        for clue in clues
+    }
+
+
+@pytest.mark.parametrize('risk_aversion', [0.0, 2.0, 3.5])
+def test_score_clues_matches_per_pair_sum(tiny_model, risk_aversion):
+    clues = ['fruit', 'car', 'river', 'Music', 'notaword']
+    targets = ['apple', 'banana', 'cherry']
+    avoid = ['truck', 'bank', 'zzzunknown']
+    assassins = ['poison']
+    scores = score_clues(clues, targets, avoid, assassins, risk_aversion)
+    expected = per_pair_scores(clues, targets, avoid, assassins, risk_aversion)
+    assert list(scores) == clues
+    for clue in clues:
+        assert scores[clue] == pytest.approx(expected[clue], abs=1e-5), clue
+    assert scores['notaword'] == 0.0
+
+
+def test_similarity_matrix_matches_per_pair(tiny_model):
+    clues = ['fruit', 'notaword', 'Car']
+    words = ['apple', 'zzzunknown', 'truck', 'fruit']
+    sims = codenames_game.similarity_matrix(clues, words)
+    for i, clue in enumerate(clues):
+        for j, word in enumerate(words):
+            assert sims[i, j] == pytest.approx(word2vec_similarity(clue, word), abs=1e-6), (clue, word)
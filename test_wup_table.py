@@ -0,0 +1,52 @@
+"""WupTable.matrix against nltk's wup_similarity on the words' first synsets"""
+import random
+
+import pytest
+
+pytest.importorskip('nltk')
+
+from codenames_game import get_wordnet
+
+
+def first_synset_wup(wn, a, b):
+    synsets_a, synsets_b = wn.synsets(a), wn.synsets(b)
+    if not synsets_a or not synsets_b:
+        return 0.0
+    return synsets_a[0].wup_similarity(synsets_b[0]) or 0.0
+
+
+@pytest.fixture(scope='module')
+def wordnet():
+    wn = get_wordnet()
+    try:
+        wn.ensure_loaded()
+    except LookupError:
+        pytest.skip("WordNet data not installed")
+    return wn
+
+
+def test_matrix_matches_nltk_on_random_words(wordnet):
+    from codenames_artifacts import load_wup_table
+    rng = random.Random(0)
+    lemmas = sorted(wordnet.all_lemma_names())
+    words_a = rng.sample(lemmas, 40) + ['dog', 'run', 'quickly', 'not_a_word']
+    words_b = rng.sample(lemmas, 40) + ['cat', 'walk', 'happy', 'not_a_word']
+    table = load_wup_table().matrix(words_a, words_b)
+    for i, a in enumerate(words_a):
+        for j, b in enumerate(words_b):
+            assert table[i, j] == pytest.approx(first_synset_wup(wordnet, a, b), abs=1e-6), (a, b)
+
+
+def test_matrix_matches_nltk_on_multiple_inheritance(wordnet):
+    # Synsets with several hypernyms are where shortest routes can detour
+    from codenames_artifacts import load_wup_table
+    rng = random.Random(1)
+    words = sorted({
+        synset.lemmas()[0].name() for synset in wordnet.all_synsets('n')
+        if len(synset.hypernyms()) > 1 and wordnet.synsets(synset.lemmas()[0].name())[0] == synset
+    })
+    words = rng.sample(words, min(40, len(words)))
+    table = load_wup_table().matrix(words, words)
+    for i, a in enumerate(words):
+        for j, b in enumerate(words):
+            assert table[i, j] == pytest.approx(first_synset_wup(wordnet, a, b), abs=1e-6), (a, b)